@@ -1,11 +1,13 @@
 import os
 import io
 import json
+import time
 import base64
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from functools import wraps
 
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, g, Response, make_response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 import bcrypt
@@ -13,7 +15,23 @@ import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-
+from markupsafe import Markup
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+import comparison
+import compression
+import exports
+import fairshare
+import httpcache
+import metrics
+import revisions
+import scheduling
+import similarity
+import storage
+import telemetry
+import trends
 from gemini_helper import (
     generate_linkedin_post,
     rewrite_content,
@@ -21,7 +39,8 @@ from gemini_helper import (
     optimize_profile,
     generate_networking_message,
     generate_content_calendar,
-    generate_analytics_recommendations
+    generate_analytics_recommendations,
+    generate_comparison_insights
 )
 
 app = Flask(__name__)
@@ -31,7 +50,10 @@ DB_PASS = "chaukul%4015D"
 DB_HOST = "localhost"
 DB_NAME = "creatortalesdb"
 
-app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}?charset=utf8mb4"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'SQLALCHEMY_DATABASE_URI',
+    f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}?charset=utf8mb4"
+)
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
@@ -41,11 +63,6 @@ login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 login_manager.login_message_category = 'info'
 
-UPLOAD_FOLDER = 'uploads'
-CHARTS_FOLDER = 'static/charts'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(CHARTS_FOLDER, exist_ok=True)
-
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -71,6 +88,59 @@ class Draft(db.Model):
     category = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    signature = db.relationship('DraftSignature', backref='draft', uselist=False, cascade='all, delete-orphan')
+    revisions = db.relationship('DraftRevision', backref='draft', lazy='dynamic', cascade='all, delete-orphan')
+
+
+class DraftSignature(db.Model):
+    draft_id = db.Column(db.Integer, db.ForeignKey('draft.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    content_signature = db.Column(db.LargeBinary(similarity.SIGNATURE_BYTES), nullable=False)
+    topic_signature = db.Column(db.LargeBinary(similarity.SIGNATURE_BYTES))
+
+
+class DraftRevision(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    draft_id = db.Column(db.Integer, db.ForeignKey('draft.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    is_snapshot = db.Column(db.Boolean, nullable=False, default=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    chars = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('draft_id', 'number'),)
+
+
+class Artifact(db.Model):
+    # Artifact keys are content hashes shared across users; a row grants one user access.
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    key = db.Column(db.String(100), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AnalyticsPeriod(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    upload_key = db.Column(db.String(100), nullable=False)
+    rows = db.Column(db.Integer, nullable=False)
+    date_range = db.Column(db.String(40))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ContentVersion(db.Model):
+    # Bumped in the same transaction as every draft or calendar write. Timestamps
+    # alone can't tell two writes in the same second apart on MySQL.
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class PostingProfile(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    profile = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class ContentCalendar(db.Model):
@@ -88,6 +158,150 @@ def load_user(user_id):
     return User.query.get(int(user_id))
 
 
+@app.after_request
+def compress_response(response):
+    # Registered first so it runs last, after the other hooks have set their headers.
+    return compression.compress_response(request, response)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.observe(
+            'request_duration_seconds',
+            time.perf_counter() - started,
+            route=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=response.status_code
+        )
+    return response
+
+
+@app.after_request
+def apply_cache_headers(response):
+    if request.endpoint == 'static':
+        return httpcache.apply_static_caching(app, request, response)
+    if request.method == 'POST' and current_user.is_authenticated and response.status_code < 400:
+        httpcache.invalidate(current_user.id)
+    return response
+
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    httpcache.static_url_defaults(app, endpoint, values)
+
+
+def _content_state(user_id):
+    # One aggregate query stands in for "has anything this user owns changed".
+    if 'content_state' not in g:
+        g.content_state = db.session.execute(select(
+            select(func.count(Draft.id)).where(Draft.user_id == user_id).scalar_subquery().label('draft_count'),
+            select(func.max(Draft.updated_at)).where(Draft.user_id == user_id).scalar_subquery().label('drafts_updated'),
+            select(func.count(ContentCalendar.id)).where(ContentCalendar.user_id == user_id).scalar_subquery().label('calendar_count'),
+            select(func.max(ContentCalendar.created_at)).where(ContentCalendar.user_id == user_id).scalar_subquery().label('calendars_created'),
+            select(ContentVersion.version).where(ContentVersion.user_id == user_id).scalar_subquery().label('version')
+        )).one()
+    return g.content_state
+
+
+def _bump_content_version(user_id):
+    bumped = db.session.execute(
+        update(ContentVersion).where(ContentVersion.user_id == user_id).values(version=ContentVersion.version + 1)
+    ).rowcount
+    if bumped:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(ContentVersion).values(user_id=user_id, version=1))
+    except IntegrityError:
+        # Another request created the row first.
+        _bump_content_version(user_id)
+
+
+def conditional_page(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Pending flash messages are rendered into the page, so those responses are never validated.
+        if request.method != 'GET' or '_flashes' in session:
+            return view(*args, **kwargs)
+
+        state = _content_state(current_user.id)
+        last_modified = max((ts for ts in (state.drafts_updated, state.calendars_created) if ts), default=None)
+        etag = httpcache.page_etag(httpcache.build_id(app), request.full_path, current_user.id, current_user.name, *state)
+        if httpcache.is_not_modified(request, etag, last_modified):
+            return httpcache.mark_revalidate(Response(status=304), etag, last_modified)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            httpcache.mark_revalidate(response, etag, last_modified)
+        return response
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    metrics.observe('db_query_duration_seconds', time.perf_counter() - started, statement=statement.split(None, 1)[0].upper())
+
+
+def _handle_db_error(context):
+    # after_cursor_execute never runs for a failed statement, so its start time is popped here.
+    conn = context.connection
+    if conn is None or not conn.info.get('query_started') or context.statement is None:
+        return
+    started = conn.info['query_started'].pop()
+    statement = context.statement.split(None, 1)[0].upper()
+    metrics.observe('db_query_duration_seconds', time.perf_counter() - started, statement=statement)
+    metrics.inc('db_query_errors_total', statement=statement)
+
+
+@app.route('/usage')
+@login_required
+def usage():
+    return jsonify({
+        'last_24h': telemetry.get_user_usage(current_user.id, days=1),
+        'by_generator': telemetry.rollup(current_user.id)
+    })
+
+
+@app.route('/queue-status')
+@login_required
+def queue_status():
+    return jsonify(fairshare.status(current_user.id))
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/artifacts/<path:key>')
+@login_required
+def artifact(key):
+    if not storage.valid_key(key) or db.session.get(Artifact, (current_user.id, key)) is None:
+        return jsonify({'error': 'Artifact not found'}), 404
+    stored = storage.load(key)
+    if stored is None:
+        return jsonify({'error': 'Artifact not found'}), 404
+    data, content_type = stored
+    response = Response(data, mimetype=content_type)
+    # Keys are content hashes, so a key always names the same bytes.
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.max_age = httpcache.STATIC_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+
 @app.route('/')
 def index():
     if current_user.is_authenticated:
@@ -164,15 +378,20 @@ def logout():
 
 @app.route('/dashboard')
 @login_required
+@conditional_page
 def dashboard():
-    recent_drafts = Draft.query.filter_by(user_id=current_user.id).order_by(Draft.updated_at.desc()).limit(5).all()
-    saved_calendars = ContentCalendar.query.filter_by(user_id=current_user.id).order_by(ContentCalendar.created_at.desc()).limit(3).all()
-    total_drafts = Draft.query.filter_by(user_id=current_user.id).count()
-    return render_template('dashboard.html', recent_drafts=recent_drafts, saved_calendars=saved_calendars, total_drafts=total_drafts)
+    state = _content_state(current_user.id)
+    panels = httpcache.fragment(current_user.id, ('dashboard',), tuple(state), lambda: render_template(
+        'dashboard_panels.html',
+        recent_drafts=Draft.query.filter_by(user_id=current_user.id).order_by(Draft.updated_at.desc()).limit(5).all(),
+        saved_calendars=ContentCalendar.query.filter_by(user_id=current_user.id).order_by(ContentCalendar.created_at.desc()).limit(3).all()
+    ))
+    return render_template('dashboard.html', dashboard_panels=Markup(panels), total_drafts=state.draft_count)
 
 
 @app.route('/post-generator', methods=['GET', 'POST'])
 @login_required
+@conditional_page
 def post_generator():
     result = None
     if request.method == 'POST':
@@ -183,13 +402,24 @@ def post_generator():
         include_carousel = request.form.get('include_carousel') == 'on'
 
         if topic:
-            result = generate_linkedin_post(topic, niche, tone, length, include_carousel)
+            if not request.form.get('generate_anyway'):
+                match = similarity.find_topic_match(
+                    current_user.id,
+                    _draft_version(current_user.id),
+                    lambda since: _load_draft_signatures(current_user.id, since),
+                    similarity.signature(topic, similarity.TOPIC_SHINGLE)
+                )
+                existing_draft = db.session.get(Draft, match[0]) if match else None
+                if existing_draft:
+                    return render_template('post_generator.html', existing_draft=existing_draft, form=request.form)
+            result = generate_linkedin_post(topic, niche, tone, length, include_carousel, request.form.get('variants', 1, type=int), user_id=current_user.id)
 
-    return render_template('post_generator.html', result=result)
+    return render_template('post_generator.html', result=result, topic=request.form.get('topic', ''))
 
 
 @app.route('/content-rewriter', methods=['GET', 'POST'])
 @login_required
+@conditional_page
 def content_rewriter():
     result = None
     if request.method == 'POST':
@@ -197,13 +427,14 @@ def content_rewriter():
         target_tone = request.form.get('target_tone', 'professional')
 
         if original_content:
-            result = rewrite_content(original_content, target_tone)
+            result = rewrite_content(original_content, target_tone, user_id=current_user.id)
 
     return render_template('content_rewriter.html', result=result)
 
 
 @app.route('/carousel-generator', methods=['GET', 'POST'])
 @login_required
+@conditional_page
 def carousel_generator():
     result = None
     if request.method == 'POST':
@@ -211,13 +442,14 @@ def carousel_generator():
         niche = request.form.get('niche', '')
 
         if topic:
-            result = generate_carousel(topic, niche)
+            result = generate_carousel(topic, niche, user_id=current_user.id)
 
     return render_template('carousel_generator.html', result=result)
 
 
 @app.route('/profile-optimizer', methods=['GET', 'POST'])
 @login_required
+@conditional_page
 def profile_optimizer():
     result = None
     if request.method == 'POST':
@@ -227,13 +459,14 @@ def profile_optimizer():
         skills = request.form.get('skills', '')
 
         if any([about, headline, experience, skills]):
-            result = optimize_profile(about, headline, experience, skills)
+            result = optimize_profile(about, headline, experience, skills, user_id=current_user.id)
 
     return render_template('profile_optimizer.html', result=result)
 
 
 @app.route('/message-generator', methods=['GET', 'POST'])
 @login_required
+@conditional_page
 def message_generator():
     result = None
     if request.method == 'POST':
@@ -242,13 +475,14 @@ def message_generator():
         context = request.form.get('context', '')
         recipient_info = request.form.get('recipient_info', '')
 
-        result = generate_networking_message(message_type, tone, context, recipient_info)
+        result = generate_networking_message(message_type, tone, context, recipient_info, request.form.get('variants', 1, type=int), user_id=current_user.id)
 
     return render_template('message_generator.html', result=result)
 
 
 @app.route('/calendar-generator', methods=['GET', 'POST'])
 @login_required
+@conditional_page
 def calendar_generator():
     result = None
     if request.method == 'POST':
@@ -257,7 +491,8 @@ def calendar_generator():
         goals = request.form.get('goals', '')
 
         if niche:
-            result = generate_content_calendar(niche, duration, goals)
+            stored = db.session.get(PostingProfile, current_user.id)
+            result = generate_content_calendar(niche, duration, goals, json.loads(stored.profile) if stored else None, user_id=current_user.id)
 
     return render_template('calendar_generator.html', result=result)
 
@@ -279,6 +514,7 @@ def save_calendar():
         content=content
     )
     db.session.add(calendar)
+    _bump_content_version(current_user.id)
     db.session.commit()
 
     return jsonify({'success': True, 'message': 'Calendar saved successfully!'})
@@ -286,13 +522,80 @@ def save_calendar():
 
 @app.route('/drafts')
 @login_required
+@conditional_page
 def drafts():
     category = request.args.get('category', 'all')
-    if category == 'all':
-        user_drafts = Draft.query.filter_by(user_id=current_user.id).order_by(Draft.updated_at.desc()).all()
-    else:
-        user_drafts = Draft.query.filter_by(user_id=current_user.id, category=category).order_by(Draft.updated_at.desc()).all()
-    return render_template('drafts.html', drafts=user_drafts, current_category=category)
+
+    def render_cards():
+        if category == 'all':
+            user_drafts = Draft.query.filter_by(user_id=current_user.id).order_by(Draft.updated_at.desc()).all()
+        else:
+            user_drafts = Draft.query.filter_by(user_id=current_user.id, category=category).order_by(Draft.updated_at.desc()).all()
+        return render_template('draft_cards.html', drafts=user_drafts)
+
+    cards = httpcache.fragment(current_user.id, ('drafts', category), tuple(_content_state(current_user.id)), render_cards)
+    return render_template('drafts.html', draft_cards=Markup(cards), current_category=category)
+
+
+def _draft_version(user_id):
+    state = _content_state(user_id)
+    return (state.draft_count, state.version)
+
+
+def _load_draft_signatures(user_id, since=None):
+    query = (
+        select(Draft.id, Draft.updated_at, DraftSignature.content_signature, DraftSignature.topic_signature)
+        .outerjoin(DraftSignature, DraftSignature.draft_id == Draft.id)
+        .where(Draft.user_id == user_id)
+    )
+    if since is not None:
+        query = query.where(Draft.updated_at >= since)
+    records = db.session.execute(query).all()
+    if since is None and any(content_sig is None for _, _, content_sig, _ in records):
+        _backfill_signatures(user_id)
+    return records
+
+
+_backfilling = set()
+_backfill_lock = threading.Lock()
+
+
+def _backfill_signatures(user_id):
+    # Drafts written in bulk (or saved before signatures existed) get their
+    # signatures off the request path and are added to the index in place.
+    with _backfill_lock:
+        if user_id in _backfilling:
+            return
+        _backfilling.add(user_id)
+
+    def run():
+        try:
+            with app.app_context():
+                missing = db.session.execute(
+                    select(Draft.id, Draft.content)
+                    .outerjoin(DraftSignature, DraftSignature.draft_id == Draft.id)
+                    .where(Draft.user_id == user_id, DraftSignature.draft_id.is_(None))
+                ).all()
+                backfill = [
+                    (draft_id, sig)
+                    for draft_id, sig in ((draft_id, similarity.signature(content)) for draft_id, content in missing)
+                    if sig is not None
+                ]
+                if backfill:
+                    db.session.execute(insert(DraftSignature), [
+                        {'draft_id': draft_id, 'user_id': user_id, 'content_signature': similarity.to_bytes(sig)}
+                        for draft_id, sig in backfill
+                    ])
+                    db.session.commit()
+                for draft_id, sig in backfill:
+                    similarity.index_draft(user_id, draft_id, sig)
+        except Exception as e:
+            print(f"Error backfilling draft signatures: {e}")
+        finally:
+            with _backfill_lock:
+                _backfilling.discard(user_id)
+
+    threading.Thread(target=run, name='signature-backfill', daemon=True).start()
 
 
 @app.route('/save-draft', methods=['POST'])
@@ -302,6 +605,29 @@ def save_draft():
     title = data.get('title', 'Untitled Draft')
     content = data.get('content', '')
     category = data.get('category', 'post')
+    topic = data.get('topic', '')
+
+    content_sig = similarity.signature(content)
+    topic_sig = similarity.signature(topic, similarity.TOPIC_SHINGLE) if topic else None
+    if content_sig is not None and not data.get('force'):
+        match = similarity.find_duplicate(
+            current_user.id,
+            _draft_version(current_user.id),
+            lambda since: _load_draft_signatures(current_user.id, since),
+            content_sig
+        )
+        existing = db.session.get(Draft, match[0]) if match else None
+        if existing:
+            return jsonify({
+                'success': False,
+                'message': f'A very similar draft already exists: "{existing.title}".',
+                'duplicate': {
+                    'id': existing.id,
+                    'title': existing.title,
+                    'similarity': match[1],
+                    'edit_url': url_for('edit_draft', draft_id=existing.id)
+                }
+            })
 
     draft = Draft(
         user_id=current_user.id,
@@ -309,14 +635,110 @@ def save_draft():
         content=content,
         category=category
     )
+    if content_sig is not None:
+        draft.signature = DraftSignature(
+            user_id=current_user.id,
+            content_signature=similarity.to_bytes(content_sig),
+            topic_signature=similarity.to_bytes(topic_sig)
+        )
     db.session.add(draft)
+    _bump_content_version(current_user.id)
     db.session.commit()
+    if content_sig is not None:
+        similarity.index_draft(current_user.id, draft.id, content_sig, topic_sig)
 
     return jsonify({'success': True, 'message': 'Draft saved successfully!', 'draft_id': draft.id})
 
 
+def _add_revision(draft, number, title, content, category, previous_content=None, created_at=None):
+    is_snapshot, data = revisions.build(number, previous_content, content)
+    db.session.add(DraftRevision(
+        draft_id=draft.id, user_id=draft.user_id, number=number, title=title, category=category,
+        is_snapshot=is_snapshot, data=data, chars=len(content), created_at=created_at or datetime.utcnow()
+    ))
+
+
+def _record_revision(draft, previous):
+    latest = db.session.execute(
+        select(func.max(DraftRevision.number)).where(DraftRevision.draft_id == draft.id)
+    ).scalar()
+    if latest is None:
+        # History starts on the first edit: the text being replaced becomes revision 1.
+        title, content, category, updated_at = previous
+        _add_revision(draft, 1, title, content, category, created_at=updated_at)
+        latest = 1
+    _add_revision(draft, latest + 1, draft.title, draft.content, draft.category, previous[1])
+
+
+def _load_revision(draft_id, number):
+    first = number - (number - 1) % revisions.SNAPSHOT_INTERVAL
+    rows = db.session.execute(
+        select(DraftRevision.number, DraftRevision.is_snapshot, DraftRevision.data, DraftRevision.title, DraftRevision.category)
+        .where(DraftRevision.draft_id == draft_id, DraftRevision.number.between(first, number))
+        .order_by(DraftRevision.number)
+    ).all()
+    if not rows or rows[-1].number != number:
+        return None
+    return {
+        'number': number,
+        'title': rows[-1].title,
+        'category': rows[-1].category,
+        'content': revisions.reconstruct((row.is_snapshot, row.data) for row in rows)
+    }
+
+
+def _list_revisions(draft_id):
+    rows = db.session.execute(
+        select(
+            DraftRevision.number, DraftRevision.title, DraftRevision.category, DraftRevision.chars,
+            DraftRevision.is_snapshot, DraftRevision.created_at, func.length(DraftRevision.data).label('stored_bytes')
+        )
+        .where(DraftRevision.draft_id == draft_id)
+        .order_by(DraftRevision.number.desc())
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def _update_draft(draft, title, content, category):
+    # Lock the draft row until commit so concurrent edits number their revisions
+    # one after the other and each delta is taken against the text it replaces.
+    db.session.refresh(draft, with_for_update=True)
+    previous = (draft.title, draft.content, draft.category, draft.updated_at)
+    draft.title = title
+    draft.content = content
+    draft.category = category
+    if (title, content, category) == previous[:3]:
+        return
+    _record_revision(draft, previous)
+    if content == previous[1]:
+        _bump_content_version(draft.user_id)
+        db.session.commit()
+        return
+
+    content_sig = similarity.signature(draft.content)
+    if content_sig is None:
+        draft.signature = None
+    elif draft.signature is None:
+        draft.signature = DraftSignature(user_id=draft.user_id, content_signature=similarity.to_bytes(content_sig))
+    else:
+        draft.signature.content_signature = similarity.to_bytes(content_sig)
+    _bump_content_version(draft.user_id)
+    db.session.commit()
+    similarity.remove_drafts(draft.user_id, [draft.id])
+    if content_sig is not None:
+        similarity.index_draft(draft.user_id, draft.id, content_sig, similarity.from_bytes(draft.signature.topic_signature))
+
+
+def _owned_draft(draft_id):
+    draft = db.session.get(Draft, draft_id)
+    if draft is None or draft.user_id != current_user.id:
+        return None
+    return draft
+
+
 @app.route('/edit-draft/<int:draft_id>', methods=['GET', 'POST'])
 @login_required
+@conditional_page
 def edit_draft(draft_id):
     draft = Draft.query.get_or_404(draft_id)
     if draft.user_id != current_user.id:
@@ -324,14 +746,98 @@ def edit_draft(draft_id):
         return redirect(url_for('drafts'))
 
     if request.method == 'POST':
-        draft.title = request.form.get('title', draft.title)
-        draft.content = request.form.get('content', draft.content)
-        draft.category = request.form.get('category', draft.category)
-        db.session.commit()
+        _update_draft(
+            draft,
+            request.form.get('title', draft.title),
+            request.form.get('content', draft.content),
+            request.form.get('category', draft.category)
+        )
         flash('Draft updated successfully!', 'success')
         return redirect(url_for('drafts'))
 
-    return render_template('edit_draft.html', draft=draft)
+    return render_template('edit_draft.html', draft=draft, revision_list=_list_revisions(draft.id))
+
+
+@app.route('/draft-revisions/<int:draft_id>')
+@login_required
+def draft_revisions(draft_id):
+    if _owned_draft(draft_id) is None:
+        return jsonify({'success': False, 'message': 'Draft not found.'}), 404
+
+    revision_list = _list_revisions(draft_id)
+    for revision in revision_list:
+        revision['created_at'] = revision['created_at'].isoformat() if revision['created_at'] else None
+    return jsonify({'success': True, 'revisions': revision_list})
+
+
+@app.route('/draft-revisions/<int:draft_id>/<int:number>')
+@login_required
+def draft_revision(draft_id, number):
+    revision = _load_revision(draft_id, number) if _owned_draft(draft_id) else None
+    if revision is None:
+        return jsonify({'success': False, 'message': 'Revision not found.'}), 404
+    return jsonify(dict(revision, success=True))
+
+
+@app.route('/draft-diff/<int:draft_id>')
+@login_required
+def draft_diff(draft_id):
+    draft = _owned_draft(draft_id)
+    if draft is None:
+        return jsonify({'success': False, 'message': 'Draft not found.'}), 404
+
+    # Defaults compare a revision with the one before it; without `to`, the current text.
+    to_number = request.args.get('to', type=int)
+    from_number = request.args.get('from', type=int)
+    if to_number is None:
+        new = {'number': None, 'content': draft.content}
+    else:
+        new = _load_revision(draft_id, to_number)
+    if from_number is None:
+        from_number = (to_number or db.session.execute(
+            select(func.max(DraftRevision.number)).where(DraftRevision.draft_id == draft_id)
+        ).scalar() or 1) - 1
+    old = _load_revision(draft_id, from_number)
+    if old is None or new is None:
+        return jsonify({'success': False, 'message': 'Revision not found.'}), 404
+
+    to_label = f"revision {to_number}" if to_number else 'current'
+    return jsonify({
+        'success': True,
+        'from': from_number,
+        'to': to_number,
+        'diff': revisions.unified_diff(old['content'], new['content'], f"revision {from_number}", to_label)
+    })
+
+
+@app.route('/restore-revision/<int:draft_id>/<int:number>', methods=['POST'])
+@login_required
+def restore_revision(draft_id, number):
+    draft = _owned_draft(draft_id)
+    revision = _load_revision(draft_id, number) if draft else None
+    if revision is None:
+        flash('Revision not found.', 'error')
+        return redirect(url_for('drafts'))
+
+    _update_draft(draft, revision['title'], revision['content'], revision['category'])
+    flash(f"Draft restored to revision {number}.", 'success')
+    return redirect(url_for('edit_draft', draft_id=draft_id))
+
+
+@app.route('/draft-content/<int:draft_id>')
+@login_required
+def draft_content(draft_id):
+    draft = Draft.query.get_or_404(draft_id)
+    if draft.user_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Access denied.'}), 403
+
+    return jsonify({
+        'success': True,
+        'id': draft.id,
+        'title': draft.title,
+        'content': draft.content,
+        'category': draft.category
+    })
 
 
 @app.route('/delete-draft/<int:draft_id>', methods=['POST'])
@@ -342,12 +848,215 @@ def delete_draft(draft_id):
         return jsonify({'success': False, 'message': 'Access denied.'})
 
     db.session.delete(draft)
+    _bump_content_version(current_user.id)
     db.session.commit()
+    similarity.remove_drafts(current_user.id, [draft_id])
     return jsonify({'success': True, 'message': 'Draft deleted successfully!'})
 
 
+MAX_BULK_DRAFTS = 1000
+DRAFT_CATEGORIES = ('post', 'carousel', 'profile', 'message', 'idea')
+
+
+def _bulk_draft_ids(data):
+    ids = data.get('draft_ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids:
+        return None, 'No drafts selected.'
+    if len(ids) > MAX_BULK_DRAFTS:
+        return None, f'At most {MAX_BULK_DRAFTS} drafts can be changed at once.'
+    try:
+        return list({int(draft_id) for draft_id in ids}), None
+    except (TypeError, ValueError):
+        return None, 'Invalid draft id.'
+
+
+@app.route('/bulk-delete-drafts', methods=['POST'])
+@login_required
+def bulk_delete_drafts():
+    draft_ids, error = _bulk_draft_ids(request.get_json(silent=True))
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+
+    # The user_id filter is the ownership check: other users' ids simply match nothing.
+    db.session.execute(
+        delete(DraftSignature).where(DraftSignature.draft_id.in_(draft_ids), DraftSignature.user_id == current_user.id)
+    )
+    db.session.execute(
+        delete(DraftRevision).where(DraftRevision.draft_id.in_(draft_ids), DraftRevision.user_id == current_user.id)
+    )
+    result = db.session.execute(
+        delete(Draft).where(Draft.id.in_(draft_ids), Draft.user_id == current_user.id)
+    )
+    _bump_content_version(current_user.id)
+    db.session.commit()
+    similarity.remove_drafts(current_user.id, draft_ids)
+    return jsonify({
+        'success': True,
+        'message': f'{result.rowcount} draft(s) deleted.',
+        'deleted': result.rowcount,
+        'skipped': len(draft_ids) - result.rowcount
+    })
+
+
+@app.route('/bulk-update-drafts', methods=['POST'])
+@login_required
+def bulk_update_drafts():
+    data = request.get_json(silent=True)
+    draft_ids, error = _bulk_draft_ids(data)
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    category = data.get('category')
+    if category not in DRAFT_CATEGORIES:
+        return jsonify({'success': False, 'message': 'Invalid category.'}), 400
+
+    result = db.session.execute(
+        update(Draft)
+        .where(Draft.id.in_(draft_ids), Draft.user_id == current_user.id)
+        .values(category=category, updated_at=datetime.utcnow())
+    )
+    _bump_content_version(current_user.id)
+    db.session.commit()
+    return jsonify({
+        'success': True,
+        'message': f'{result.rowcount} draft(s) moved to {category}.',
+        'updated': result.rowcount,
+        'skipped': len(draft_ids) - result.rowcount
+    })
+
+
+@app.route('/bulk-duplicate-drafts', methods=['POST'])
+@login_required
+def bulk_duplicate_drafts():
+    draft_ids, error = _bulk_draft_ids(request.get_json(silent=True))
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+
+    originals = db.session.execute(
+        select(Draft.title, Draft.content, Draft.category)
+        .where(Draft.id.in_(draft_ids), Draft.user_id == current_user.id)
+    ).all()
+    now = datetime.utcnow()
+    copies = [
+        {
+            'user_id': current_user.id,
+            'title': f'Copy of {title}'[:200],
+            'content': content,
+            'category': category,
+            'created_at': now,
+            'updated_at': now
+        }
+        for title, content, category in originals
+    ]
+    if copies:
+        db.session.execute(insert(Draft), copies)
+        _bump_content_version(current_user.id)
+        db.session.commit()
+        _backfill_signatures(current_user.id)
+    return jsonify({
+        'success': True,
+        'message': f'{len(copies)} draft(s) duplicated.',
+        'duplicated': len(copies),
+        'skipped': len(draft_ids) - len(copies)
+    })
+
+
+@app.route('/import-drafts', methods=['POST'])
+@login_required
+def import_drafts():
+    data = request.get_json(silent=True)
+    items = data.get('drafts') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'message': 'No drafts to import.'}), 400
+    if len(items) > MAX_BULK_DRAFTS:
+        return jsonify({'success': False, 'message': f'At most {MAX_BULK_DRAFTS} drafts can be imported at once.'}), 400
+
+    now = datetime.utcnow()
+    rows = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not str(item.get('content', '')).strip():
+            return jsonify({'success': False, 'message': f'Draft {index + 1} has no content.'}), 400
+        category = item.get('category', 'post')
+        rows.append({
+            'user_id': current_user.id,
+            'title': str(item.get('title') or 'Untitled Draft')[:200],
+            'content': str(item['content']),
+            'category': category if category in DRAFT_CATEGORIES else 'post',
+            'created_at': now,
+            'updated_at': now
+        })
+
+    db.session.execute(insert(Draft), rows)
+    _bump_content_version(current_user.id)
+    db.session.commit()
+    _backfill_signatures(current_user.id)
+    return jsonify({'success': True, 'message': f'{len(rows)} draft(s) imported.', 'imported': len(rows)})
+
+
+EXPORT_TABLES = {
+    'drafts': (Draft, exports.DRAFT_FIELDS),
+    'calendars': (ContentCalendar, exports.CALENDAR_FIELDS)
+}
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'zip': 'application/zip'
+}
+
+
+def _iter_user_rows(model, fields, user_id, record_type=None):
+    # yield_per streams from a server-side cursor, so memory stays flat however many rows the user has.
+    result = db.session.execute(
+        select(*(getattr(model, field) for field in fields))
+        .where(model.user_id == user_id)
+        .order_by(model.id)
+        .execution_options(yield_per=500)
+    )
+    for row in result:
+        record = row._asdict()
+        if record_type:
+            record['type'] = record_type
+        yield record
+
+
+@app.route('/export')
+@login_required
+def export_content():
+    table = request.args.get('table', 'all')
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_MIMETYPES or (table != 'all' and table not in EXPORT_TABLES):
+        return jsonify({'success': False, 'message': 'Unsupported export.'}), 400
+    if fmt == 'csv' and table == 'all':
+        return jsonify({'success': False, 'message': 'CSV export needs a single table; use ZIP for everything.'}), 400
+
+    user_id = current_user.id
+    tables = list(EXPORT_TABLES) if table == 'all' else [table]
+
+    if fmt == 'ndjson':
+        body = exports.ndjson_stream(
+            record
+            for name in tables
+            for record in _iter_user_rows(*EXPORT_TABLES[name], user_id, record_type=name.rstrip('s'))
+        )
+    elif fmt == 'csv':
+        model, fields = EXPORT_TABLES[table]
+        body = exports.csv_stream(_iter_user_rows(model, fields, user_id), fields)
+    else:
+        body = exports.zip_stream(
+            (f'{name}.csv', exports.csv_stream(_iter_user_rows(*EXPORT_TABLES[name], user_id), EXPORT_TABLES[name][1]))
+            for name in tables
+        )
+
+    filename = f"creator-tales-{table}-{datetime.utcnow().strftime('%Y%m%d')}.{fmt}"
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
 @app.route('/analytics', methods=['GET', 'POST'])
 @login_required
+@conditional_page
 def analytics():
     analysis_result = None
     charts = []
@@ -363,17 +1072,23 @@ def analytics():
             flash('No file selected.', 'error')
             return render_template('analytics.html')
 
-        if file and (file.filename.endswith('.csv') or file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
+        if file and _is_analytics_export(file.filename):
             try:
-                if file.filename.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file)
+                data = file.read()
+                with metrics.timer('analysis_duration_seconds', stage='parse'):
+                    df = comparison.read_export(data, file.filename)
 
                 analysis_result, charts = analyze_linkedin_data(df, current_user.id)
-                
+                for chart in charts:
+                    db.session.merge(Artifact(user_id=current_user.id, key=chart['key']))
+                _store_period(file.filename, data, analysis_result['total_posts'], analysis_result['date_range'])
+                if analysis_result.get('posting_profile'):
+                    db.session.merge(PostingProfile(user_id=current_user.id, profile=json.dumps(analysis_result['posting_profile'])))
+                db.session.commit()
+                _delete_periods(_expired_periods(current_user.id))
+
                 if analysis_result:
-                    ai_recommendations = generate_analytics_recommendations(analysis_result)
+                    ai_recommendations = generate_analytics_recommendations(analysis_result, user_id=current_user.id)
 
             except Exception as e:
                 flash(f'Error processing file: {str(e)}', 'error')
@@ -383,25 +1098,137 @@ def analytics():
     return render_template('analytics.html', analysis=analysis_result, charts=charts, recommendations=ai_recommendations)
 
 
+def _is_analytics_export(filename):
+    return filename.lower().endswith(('.csv', '.xlsx', '.xls'))
+
+
+PERIOD_RETENTION_DAYS = int(os.environ.get('PERIOD_RETENTION_DAYS', '90'))
+MAX_SAVED_PERIODS = 20
+
+
+def _store_period(filename, data, rows, date_range):
+    # Uploads are kept so they can be picked again as a period to compare.
+    key = storage.save('uploads', data, filename.rsplit('.', 1)[-1].lower())
+    period = AnalyticsPeriod.query.filter_by(user_id=current_user.id, upload_key=key).first()
+    if period is None:
+        db.session.add(AnalyticsPeriod(
+            user_id=current_user.id, filename=filename[:255], upload_key=key, rows=rows, date_range=date_range
+        ))
+    else:
+        period.created_at = datetime.utcnow()
+
+
+def _expired_periods(user_id):
+    cutoff = datetime.utcnow() - timedelta(days=PERIOD_RETENTION_DAYS)
+    periods = AnalyticsPeriod.query.filter_by(user_id=user_id).order_by(AnalyticsPeriod.created_at.desc()).all()
+    return [period for index, period in enumerate(periods) if index >= MAX_SAVED_PERIODS or period.created_at < cutoff]
+
+
+def _delete_periods(periods):
+    # Commits the row deletes, then drops blobs no other saved period still points at.
+    keys = {period.upload_key for period in periods}
+    for period in periods:
+        db.session.delete(period)
+    db.session.flush()
+    shared = set(db.session.scalars(select(AnalyticsPeriod.upload_key).where(AnalyticsPeriod.upload_key.in_(keys)))) if keys else set()
+    db.session.commit()
+    for key in keys - shared:
+        try:
+            storage.delete(key)
+        except Exception as e:
+            print(f"Error deleting upload {key}: {e}")
+
+
+@app.route('/download-analytics-period/<int:period_id>')
+@login_required
+def download_analytics_period(period_id):
+    period = AnalyticsPeriod.query.filter_by(id=period_id, user_id=current_user.id).first_or_404()
+    stored = storage.load(period.upload_key)
+    if stored is None:
+        return jsonify({'error': 'Upload no longer available'}), 404
+    data, content_type = stored
+    extension = period.upload_key.rsplit('.', 1)[-1]
+    filename = secure_filename(period.filename) or f'analytics.{extension}'
+    response = Response(data, mimetype=content_type, headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.cache_control.private = True
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route('/delete-analytics-period/<int:period_id>', methods=['POST'])
+@login_required
+def delete_analytics_period(period_id):
+    period = AnalyticsPeriod.query.filter_by(id=period_id, user_id=current_user.id).first()
+    if period is None:
+        return jsonify({'success': False, 'message': 'Access denied.'})
+    _delete_periods([period])
+    return jsonify({'success': True, 'message': 'Saved upload deleted.'})
+
+
+def _frame_date_range(frame):
+    dates = frame['date'].dropna()
+    if dates.empty:
+        return 'N/A'
+    return f"{dates.min():%Y-%m-%d} to {dates.max():%Y-%m-%d}"
+
+
+@app.route('/analytics-compare', methods=['GET', 'POST'])
+@login_required
+def analytics_compare():
+    result = None
+    insights = None
+
+    if request.method == 'POST':
+        files = [file for file in request.files.getlist('analytics_files') if file and file.filename]
+        period_ids = request.form.getlist('period_ids', type=int)
+        count = len(files) + len(period_ids)
+        if count < 2:
+            flash('Choose at least two files or saved periods to compare.', 'error')
+        elif count > comparison.MAX_PERIODS:
+            flash(f'At most {comparison.MAX_PERIODS} periods can be compared at once.', 'error')
+        elif not all(_is_analytics_export(file.filename) for file in files):
+            flash('Please upload CSV or Excel files.', 'error')
+        else:
+            sources = []
+            missing = []
+            stored = AnalyticsPeriod.query.filter(
+                AnalyticsPeriod.id.in_(period_ids), AnalyticsPeriod.user_id == current_user.id
+            ).all() if period_ids else []
+            for period in stored:
+                artifact = storage.load(period.upload_key)
+                if artifact is None:
+                    missing.append(period.filename)
+                else:
+                    sources.append((period.filename[:60], artifact[0], period.filename))
+            uploads = [(file.filename, file.read()) for file in files]
+            sources.extend((filename[:60], data, filename) for filename, data in uploads)
+
+            if missing:
+                flash(f"No longer available: {', '.join(missing)}. Please upload them again.", 'error')
+            elif len(sources) < 2:
+                flash('Choose at least two files or saved periods to compare.', 'error')
+            else:
+                try:
+                    frames = comparison.load_periods(sources)
+                    for (filename, data), frame in zip(uploads, frames[len(stored):]):
+                        _store_period(filename, data, len(frame), _frame_date_range(frame))
+                    db.session.commit()
+                    _delete_periods(_expired_periods(current_user.id))
+
+                    with metrics.timer('analysis_duration_seconds', stage='compare'):
+                        result = comparison.compare(frames, [source[0] for source in sources])
+                    insights = generate_comparison_insights(comparison.prompt_fields(result), user_id=current_user.id)
+                except Exception as e:
+                    flash(f'Error processing files: {str(e)}', 'error')
+
+    periods = AnalyticsPeriod.query.filter_by(user_id=current_user.id).order_by(AnalyticsPeriod.created_at.desc()).all()
+    return render_template('analytics_compare.html', periods=periods, result=result, insights=insights, max_periods=comparison.MAX_PERIODS)
+
+
 def analyze_linkedin_data(df, user_id):
-    df.columns = df.columns.str.lower().str.strip()
-    
-    possible_columns = {
-        'impressions': ['impressions', 'views', 'impression', 'view'],
-        'reactions': ['reactions', 'likes', 'reaction', 'like'],
-        'comments': ['comments', 'comment'],
-        'shares': ['shares', 'share', 'reposts', 'repost'],
-        'date': ['date', 'publish date', 'published', 'post date', 'created'],
-        'title': ['title', 'post title', 'content', 'post', 'text'],
-        'type': ['type', 'post type', 'content type', 'format']
-    }
-    
-    column_mapping = {}
-    for standard_name, alternatives in possible_columns.items():
-        for alt in alternatives:
-            if alt in df.columns:
-                column_mapping[standard_name] = alt
-                break
+    started = time.perf_counter()
+    column_mapping = comparison.detect_columns(df)
     
     analysis = {
         'total_posts': len(df),
@@ -418,7 +1245,10 @@ def analyze_linkedin_data(df, user_id):
         'top_posts': [],
         'best_day': 'N/A',
         'best_content_type': 'N/A',
-        'posting_frequency': 'N/A'
+        'posting_frequency': 'N/A',
+        'posting_profile': None,
+        'trend_features': {},
+        'outliers': []
     }
     
     charts = []
@@ -463,6 +1293,10 @@ def analyze_linkedin_data(df, user_id):
                 day_performance = df.groupby('day_of_week')[column_mapping['impressions']].mean()
                 if len(day_performance) > 0:
                     analysis['best_day'] = day_performance.idxmax()
+
+            score_col = column_mapping.get('impressions') or column_mapping.get('reactions')
+            if score_col:
+                analysis['posting_profile'] = scheduling.build_profile(df, date_col, score_col, column_mapping.get('type'))
     
     if 'type' in column_mapping:
         type_col = column_mapping['type']
@@ -481,19 +1315,32 @@ def analyze_linkedin_data(df, user_id):
                 'reactions': int(row[column_mapping.get('reactions', column_mapping['impressions'])]) if 'reactions' in column_mapping else 0
             })
     
+    if 'impressions' in column_mapping:
+        frame = comparison.standardize(df, column_mapping)
+        analysis['trend_features'] = trends.feature_vector(frame)
+        analysis['outliers'] = trends.outliers(frame)
+    
+    metrics.observe('analysis_duration_seconds', time.perf_counter() - started, stage='analyze')
     charts = generate_analytics_charts(df, column_mapping, user_id)
     
     return analysis, charts
 
 
+def save_chart(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+    plt.close(fig)
+    return storage.save('charts', buffer.getvalue(), 'png')
+
+
 def generate_analytics_charts(df, column_mapping, user_id):
     charts = []
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
     
     plt.style.use('seaborn-v0_8-whitegrid')
     
     if 'impressions' in column_mapping and 'date' in column_mapping:
         try:
+            started = time.perf_counter()
             fig, ax = plt.subplots(figsize=(10, 5))
             date_col = column_mapping['date']
             imp_col = column_mapping['impressions']
@@ -507,15 +1354,15 @@ def generate_analytics_charts(df, column_mapping, user_id):
             plt.xticks(rotation=45)
             plt.tight_layout()
             
-            chart_path = f'static/charts/impressions_{user_id}_{timestamp}.png'
-            plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-            plt.close()
-            charts.append({'name': 'Impression Trends', 'path': chart_path})
+            chart_key = save_chart(fig)
+            metrics.observe('chart_render_duration_seconds', time.perf_counter() - started, chart='impressions')
+            charts.append({'name': 'Impression Trends', 'key': chart_key})
         except Exception as e:
             print(f"Error creating impression chart: {e}")
     
     if 'day_of_week' in df.columns and 'impressions' in column_mapping:
         try:
+            started = time.perf_counter()
             fig, ax = plt.subplots(figsize=(10, 5))
             day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
             day_performance = df.groupby('day_of_week')[column_mapping['impressions']].mean().reindex(day_order)
@@ -528,10 +1375,9 @@ def generate_analytics_charts(df, column_mapping, user_id):
             plt.xticks(rotation=45)
             plt.tight_layout()
             
-            chart_path = f'static/charts/day_performance_{user_id}_{timestamp}.png'
-            plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-            plt.close()
-            charts.append({'name': 'Day of Week Performance', 'path': chart_path})
+            chart_key = save_chart(fig)
+            metrics.observe('chart_render_duration_seconds', time.perf_counter() - started, chart='day_performance')
+            charts.append({'name': 'Day of Week Performance', 'key': chart_key})
         except Exception as e:
             print(f"Error creating day chart: {e}")
     
@@ -549,6 +1395,7 @@ def generate_analytics_charts(df, column_mapping, user_id):
     
     if engagement_data:
         try:
+            started = time.perf_counter()
             fig, ax = plt.subplots(figsize=(8, 8))
             colors = ['#0077B5', '#00A0DC', '#86C5E5']
             explode = [0.05] * len(engagement_data)
@@ -557,15 +1404,15 @@ def generate_analytics_charts(df, column_mapping, user_id):
             ax.set_title('Engagement Distribution', fontsize=14, fontweight='bold')
             plt.tight_layout()
             
-            chart_path = f'static/charts/engagement_{user_id}_{timestamp}.png'
-            plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-            plt.close()
-            charts.append({'name': 'Engagement Distribution', 'path': chart_path})
+            chart_key = save_chart(fig)
+            metrics.observe('chart_render_duration_seconds', time.perf_counter() - started, chart='engagement')
+            charts.append({'name': 'Engagement Distribution', 'key': chart_key})
         except Exception as e:
             print(f"Error creating engagement chart: {e}")
     
     if 'type' in column_mapping and 'impressions' in column_mapping:
         try:
+            started = time.perf_counter()
             fig, ax = plt.subplots(figsize=(10, 5))
             type_col = column_mapping['type']
             type_performance = df.groupby(type_col)[column_mapping['impressions']].mean().sort_values(ascending=True)
@@ -577,15 +1424,15 @@ def generate_analytics_charts(df, column_mapping, user_id):
             ax.set_title('Performance by Content Type', fontsize=14, fontweight='bold')
             plt.tight_layout()
             
-            chart_path = f'static/charts/content_type_{user_id}_{timestamp}.png'
-            plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-            plt.close()
-            charts.append({'name': 'Content Type Performance', 'path': chart_path})
+            chart_key = save_chart(fig)
+            metrics.observe('chart_render_duration_seconds', time.perf_counter() - started, chart='content_type')
+            charts.append({'name': 'Content Type Performance', 'key': chart_key})
         except Exception as e:
             print(f"Error creating content type chart: {e}")
     
     if 'date' in column_mapping:
         try:
+            started = time.perf_counter()
             fig, ax = plt.subplots(figsize=(10, 5))
             date_col = column_mapping['date']
             df['month'] = df[date_col].dt.to_period('M')
@@ -598,10 +1445,9 @@ def generate_analytics_charts(df, column_mapping, user_id):
             plt.xticks(rotation=45)
             plt.tight_layout()
             
-            chart_path = f'static/charts/frequency_{user_id}_{timestamp}.png'
-            plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-            plt.close()
-            charts.append({'name': 'Posting Frequency', 'path': chart_path})
+            chart_key = save_chart(fig)
+            metrics.observe('chart_render_duration_seconds', time.perf_counter() - started, chart='frequency')
+            charts.append({'name': 'Posting Frequency', 'key': chart_key})
         except Exception as e:
             print(f"Error creating frequency chart: {e}")
     
@@ -609,6 +1455,9 @@ def generate_analytics_charts(df, column_mapping, user_id):
 
 
 with app.app_context():
+    event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(db.engine, 'handle_error', _handle_db_error)
     db.create_all()
 
 
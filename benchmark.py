@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Reproducible benchmarks for the analytics, chart and database hot paths.
+#
+#   python benchmark.py                          # full suite, writes bench_results/<commit>.json
+#   python benchmark.py --sizes 1000 --drafts 10 --compare bench_results/abc1234.json
+#
+# The database defaults to a throwaway SQLite file; set SQLALCHEMY_DATABASE_URI
+# to benchmark against MySQL instead.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+POST_TYPES = np.array(['Text', 'Image', 'Carousel', 'Video', 'Poll', 'Article'])
+
+
+def synthetic_export(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2020-01-01')
+    impressions = rng.lognormal(7, 1.2, rows).astype(np.int64)
+    return pd.DataFrame({
+        'Date': start + rng.integers(0, 5 * 365, rows).astype('timedelta64[D]'),
+        'Impressions': impressions,
+        'Reactions': (impressions * rng.uniform(0.005, 0.05, rows)).astype(np.int64),
+        'Comments': (impressions * rng.uniform(0.0005, 0.005, rows)).astype(np.int64),
+        'Reposts': (impressions * rng.uniform(0.0001, 0.002, rows)).astype(np.int64),
+        'Post type': POST_TYPES[rng.integers(0, len(POST_TYPES), rows)],
+        'Post title': np.char.add('Synthetic post ', np.arange(rows).astype(str)),
+    })
+
+
+def measure(fn, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(name, params, timings):
+    return {
+        'name': name,
+        'params': params,
+        'repeat': len(timings),
+        'min_s': round(min(timings), 6),
+        'median_s': round(statistics.median(timings), 6),
+        'mean_s': round(statistics.fmean(timings), 6),
+    }
+
+
+def bench_parsing(df, rows, formats, repeat, workdir):
+    results = []
+    for fmt in formats:
+        path = os.path.join(workdir, f"export_{rows}.{fmt}")
+        if fmt == 'csv':
+            df.to_csv(path, index=False)
+            reader = pd.read_csv
+        else:
+            df.to_excel(path, index=False)
+            reader = pd.read_excel
+        results.append(summarize(f"parse_{fmt}", {'rows': rows}, measure(lambda: reader(path), repeat)))
+    return results
+
+
+def bench_analysis(app_module, df, rows, repeat):
+    import metrics
+
+    results = []
+    analyze_timings = []
+    chart_timings = {}
+    for _ in range(repeat):
+        metrics.reset()
+        frame = df.copy()
+        app_module.analyze_linkedin_data(frame, user_id=0)
+        for labels, (count, total) in metrics.totals('analysis_duration_seconds').items():
+            if dict(labels).get('stage') == 'analyze':
+                analyze_timings.append(total)
+        for labels, (count, total) in metrics.totals('chart_render_duration_seconds').items():
+            chart_timings.setdefault(dict(labels)['chart'], []).append(total)
+
+    results.append(summarize('analyze_linkedin_data', {'rows': rows}, analyze_timings))
+    for chart, timings in sorted(chart_timings.items()):
+        results.append(summarize('render_chart', {'rows': rows, 'chart': chart}, timings))
+    return results
+
+
+def seed_drafts(app_module, user_id, count):
+    from sqlalchemy import insert
+
+    db = app_module.db
+    db.session.execute(app_module.Draft.__table__.delete().where(app_module.Draft.user_id == user_id))
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': user_id,
+            'title': f"Draft {i}",
+            'content': f"Benchmark draft body {i}. " * 20,
+            'category': ('post', 'carousel', 'profile', 'message', 'idea')[i % 5],
+            'created_at': now - timedelta(minutes=i),
+            'updated_at': now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+    for start in range(0, count, 5000):
+        db.session.execute(insert(app_module.Draft), rows[start:start + 5000])
+    db.session.commit()
+
+
+def bench_database(app_module, draft_counts, repeat):
+    import httpcache
+
+    results = []
+    app = app_module.app
+    with app.app_context():
+        user = app_module.User.query.filter_by(email='benchmark@example.com').first()
+        if user is None:
+            user = app_module.User(name='Benchmark', email='benchmark@example.com')
+            user.set_password('benchmark')
+            app_module.db.session.add(user)
+            app_module.db.session.commit()
+        user_id = user.id
+
+    client = app.test_client()
+    client.post('/login', data={'email': 'benchmark@example.com', 'password': 'benchmark'})
+
+    def cold():
+        httpcache.invalidate(user_id)
+        return ()
+
+    for count in draft_counts:
+        with app.app_context():
+            seed_drafts(app_module, user_id, count)
+        params = {'drafts': count}
+        # The plain names time the query path with the fragment cache emptied
+        # first, so they stay comparable with results from before the cache;
+        # *_warm times repeat views served from it.
+        for name, path in (('drafts_page', '/drafts'), ('drafts_page_category', '/drafts?category=post'), ('dashboard_page', '/dashboard')):
+            results.append(summarize(name, params, measure(lambda: client.get(path), repeat, setup=cold)))
+            client.get(path)
+            results.append(summarize(f'{name}_warm', params, measure(lambda: client.get(path), repeat)))
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['name'], json.dumps(r['params'], sort_keys=True)): r for r in baseline['results']}
+    print(f"\n{'benchmark':<55}{'before s':>12}{'after s':>12}{'change':>9}")
+    for r in results:
+        key = (r['name'], json.dumps(r['params'], sort_keys=True))
+        if key not in previous:
+            continue
+        before, after = previous[key]['median_s'], r['median_s']
+        change = (after - before) / before * 100 if before else 0.0
+        label = f"{r['name']} {json.dumps(r['params'], sort_keys=True)}"
+        print(f"{label:<55}{before:>12.4f}{after:>12.4f}{change:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analytics, chart rendering and database hot paths.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000], help='rows per synthetic export')
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'xlsx'], default=['csv', 'xlsx'])
+    parser.add_argument('--drafts', type=int, nargs='+', default=[10, 1_000, 10_000], help='drafts per user')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='defaults to bench_results/<commit>.json')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args()
+
+    # Chart artifacts (ARTIFACT_DIR) are written relative to the working directory.
+    workdir = tempfile.mkdtemp(prefix='creator-tales-bench-')
+    os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.setdefault('TELEMETRY_DB', os.path.join(workdir, 'telemetry.db'))
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    import app as app_module
+
+    results = []
+    for rows in args.sizes:
+        df = synthetic_export(rows, args.seed)
+        print(f"rows={rows}: parsing")
+        results.extend(bench_parsing(df, rows, args.formats, args.repeat, workdir))
+        print(f"rows={rows}: analysis and charts")
+        results.extend(bench_analysis(app_module, df, rows, args.repeat))
+    print(f"drafts={args.drafts}: database")
+    results.extend(bench_database(app_module, args.drafts, args.repeat))
+
+    for r in results:
+        print(f"{r['name']:<24}{json.dumps(r['params'], sort_keys=True):<45}{r['median_s']:>12.4f}s")
+
+    commit = current_commit()
+    output = args.output or os.path.join(ROOT, 'bench_results', f"{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'database': app_module.app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+            'results': results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
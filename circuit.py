@@ -0,0 +1,175 @@
+import os
+import re
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from functools import wraps
+
+import metrics
+
+# Circuit breaker for the model backend. It trips when the recent error or
+# slow-call rate stays above a threshold, refuses calls for CIRCUIT_OPEN_SECONDS
+# and then lets a single probe through (half-open). While it is not closed,
+# generators answer with the last good result for the same normalized inputs,
+# marked stale; those results are regenerated in the background on recovery.
+
+CIRCUIT_WINDOW = int(os.environ.get('CIRCUIT_WINDOW', '20'))
+CIRCUIT_MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', '5'))
+CIRCUIT_FAILURE_RATE = float(os.environ.get('CIRCUIT_FAILURE_RATE', '0.5'))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.environ.get('CIRCUIT_SLOW_CALL_SECONDS', '30'))
+CIRCUIT_SLOW_RATE = float(os.environ.get('CIRCUIT_SLOW_RATE', '0.8'))
+CIRCUIT_OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', '30'))
+STALE_CACHE_SIZE = int(os.environ.get('STALE_CACHE_SIZE', '512'))
+MAX_REFRESHES = 50
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name, on_recover=None):
+        self.name = name
+        self.on_recover = on_recover
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.outcomes = deque(maxlen=CIRCUIT_WINDOW)
+        self._lock = threading.Lock()
+
+    def _transition(self, state):
+        logging.error(f"Circuit {self.name}: {self.state} -> {state}")
+        metrics.inc('circuit_transitions_total', circuit=self.name, state=state)
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        self.probing = False
+        self.outcomes.clear()
+
+    def allow(self):
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= CIRCUIT_OPEN_SECONDS:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return
+        metrics.inc('circuit_rejected_total', circuit=self.name)
+        raise CircuitOpenError('The AI service is having trouble right now. Please try again shortly.')
+
+    def record(self, ok, latency):
+        recovered = False
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if ok and latency < CIRCUIT_SLOW_CALL_SECONDS:
+                    self._transition(CLOSED)
+                    recovered = True
+                else:
+                    self._transition(OPEN)
+            elif self.state == CLOSED:
+                self.outcomes.append((ok, latency >= CIRCUIT_SLOW_CALL_SECONDS))
+                if len(self.outcomes) >= CIRCUIT_MIN_CALLS:
+                    failures = sum(1 for ok, _ in self.outcomes if not ok) / len(self.outcomes)
+                    slow = sum(1 for _, slow in self.outcomes if slow) / len(self.outcomes)
+                    if failures >= CIRCUIT_FAILURE_RATE or slow >= CIRCUIT_SLOW_RATE:
+                        self._transition(OPEN)
+        if recovered and self.on_recover:
+            self.on_recover()
+
+    def release_probe(self):
+        # A probe that ended without a verdict (e.g. it never reached the backend).
+        with self._lock:
+            self.probing = False
+
+    @property
+    def degraded(self):
+        return self.state != CLOSED
+
+
+_stale = OrderedDict()
+_refresh = OrderedDict()
+_stale_lock = threading.Lock()
+
+
+def _normalize(value):
+    # Only whitespace is collapsed: case can matter to the result (e.g. a rewrite).
+    if isinstance(value, str):
+        return re.sub(r'\s+', ' ', value).strip()
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def input_key(generator, user_id, args, kwargs):
+    # Results are only ever served back to the user they were generated for.
+    normalized = json.dumps([generator, user_id, _normalize(list(args)), _normalize(kwargs)], sort_keys=True, default=str)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _remember(key, result):
+    with _stale_lock:
+        _stale[key] = copy.deepcopy(result)
+        _stale.move_to_end(key)
+        while len(_stale) > STALE_CACHE_SIZE:
+            _stale.popitem(last=False)
+        _refresh.pop(key, None)
+
+
+def _refresh_stale():
+    with _stale_lock:
+        pending = list(_refresh.items())
+        _refresh.clear()
+
+    def run():
+        for key, (generator, func, args, kwargs) in pending:
+            if breaker.degraded:
+                return
+            result = func(*args, **kwargs)
+            if not result.get('error'):
+                _remember(key, result)
+                metrics.inc('stale_refreshes_total', generator=generator)
+
+    threading.Thread(target=run, name='stale-refresh', daemon=True).start()
+
+
+breaker = CircuitBreaker('gemini', on_recover=_refresh_stale)
+
+
+def serve_stale(generator):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            # user_id is passed by keyword, so the refresh replays the call for the same user.
+            params = {name: value for name, value in kwargs.items() if name != 'user_id'}
+            key = input_key(generator, kwargs.get('user_id'), args, params)
+            if not result.get('error'):
+                _remember(key, result)
+                return result
+            if not breaker.degraded:
+                return result
+
+            with _stale_lock:
+                cached = _stale.get(key)
+                if cached is None:
+                    metrics.inc('stale_results_total', generator=generator, result='miss')
+                    return result
+                if key not in _refresh and len(_refresh) < MAX_REFRESHES:
+                    _refresh[key] = (generator, func, args, kwargs)
+            metrics.inc('stale_results_total', generator=generator, result='hit')
+            stale = copy.deepcopy(cached)
+            stale['stale'] = True
+            return stale
+        return wrapper
+    return decorator
@@ -0,0 +1,200 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# Side-by-side analysis of several analytics exports (e.g. this quarter against
+# last quarter). Exports are parsed in parallel, stacked into one frame and
+# compared with grouped/vectorized operations against the first period.
+
+COLUMN_ALIASES = {
+    'impressions': ['impressions', 'views', 'impression', 'view'],
+    'reactions': ['reactions', 'likes', 'reaction', 'like'],
+    'comments': ['comments', 'comment'],
+    'shares': ['shares', 'share', 'reposts', 'repost'],
+    'date': ['date', 'publish date', 'published', 'post date', 'created'],
+    'title': ['title', 'post title', 'content', 'post', 'text'],
+    'type': ['type', 'post type', 'content type', 'format']
+}
+METRIC_COLUMNS = ['impressions', 'reactions', 'comments', 'shares']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MAX_PERIODS = 4
+TOP_POSTS = 10
+SHIFTS_PER_PERIOD = 3
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', '4'))
+
+_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='analysis')
+
+
+def detect_columns(df):
+    df.columns = df.columns.str.lower().str.strip()
+    column_mapping = {}
+    for standard_name, alternatives in COLUMN_ALIASES.items():
+        for alt in alternatives:
+            if alt in df.columns:
+                column_mapping[standard_name] = alt
+                break
+    return column_mapping
+
+
+def read_export(data, filename):
+    if filename.lower().endswith('.csv'):
+        return pd.read_csv(io.BytesIO(data))
+    return pd.read_excel(io.BytesIO(data))
+
+
+def standardize(df, column_mapping):
+    frame = pd.DataFrame(index=df.index)
+    for name in METRIC_COLUMNS:
+        if name in column_mapping:
+            frame[name] = pd.to_numeric(df[column_mapping[name]], errors='coerce').fillna(0)
+        else:
+            frame[name] = 0.0
+    frame['date'] = pd.to_datetime(df[column_mapping['date']], errors='coerce') if 'date' in column_mapping else pd.NaT
+    frame['type'] = df[column_mapping['type']].astype(str).str.strip().str.title() if 'type' in column_mapping else None
+    frame['title'] = df[column_mapping['title']].fillna('').astype(str).str.strip() if 'title' in column_mapping else ''
+    return frame
+
+
+def _load_period(source):
+    label, data, filename = source
+    with metrics.timer('analysis_duration_seconds', stage='compare_parse'):
+        df = read_export(data, filename)
+        column_mapping = detect_columns(df)
+        if 'impressions' not in column_mapping:
+            raise ValueError(f"{label} has no impressions column.")
+        return standardize(df, column_mapping)
+
+
+def load_periods(sources):
+    # sources: (label, bytes, filename). Parsing dominates, so each export gets a worker.
+    return list(_pool.map(_load_period, sources))
+
+
+def _pct_change(values, baseline):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (values / baseline - 1) * 100
+    return change.replace([np.inf, -np.inf], np.nan)
+
+
+def _top_shifts(shift, labels, formatter):
+    shifts = []
+    for period in shift.index[1:]:
+        row = shift.loc[period].dropna()
+        row = row.reindex(row.abs().sort_values(ascending=False).index)[:SHIFTS_PER_PERIOD]
+        shifts.append({'label': labels[period], 'changes': [formatter(name, value) for name, value in row.items()]})
+    return shifts
+
+
+def compare(frames, labels):
+    # The earliest period is the baseline the others are measured against.
+    starts = [frame['date'].min() for frame in frames]
+    order = sorted(range(len(frames)), key=lambda i: (pd.isna(starts[i]), starts[i] if pd.notna(starts[i]) else 0))
+    frames = [frames[i] for i in order]
+    labels = [labels[i] for i in order]
+
+    combined = pd.concat(frames, keys=range(len(frames)), names=['period', 'row']).reset_index(level='period').reset_index(drop=True)
+    combined['engagement'] = combined[['reactions', 'comments', 'shares']].sum(axis=1)
+    grouped = combined.groupby('period')
+
+    totals = grouped.agg(
+        posts=('impressions', 'size'),
+        impressions=('impressions', 'sum'),
+        avg_impressions=('impressions', 'mean'),
+        engagement=('engagement', 'sum'),
+        start=('date', 'min'),
+        end=('date', 'max')
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        totals['engagement_rate'] = (totals['engagement'] / totals['impressions'] * 100).replace([np.inf, -np.inf], np.nan)
+    weeks = ((totals['end'] - totals['start']).dt.days + 1) / 7
+    totals['posts_per_week'] = totals['posts'] / weeks.clip(lower=1)
+
+    baseline = totals.iloc[0]
+    impressions_change = _pct_change(totals['avg_impressions'], baseline['avg_impressions'])
+    cadence_change = _pct_change(totals['posts_per_week'], baseline['posts_per_week'])
+    rate_change = totals['engagement_rate'] - baseline['engagement_rate']
+
+    # Weekday lift: a day's mean impressions relative to the period's own mean.
+    dated = combined[combined['date'].notna()]
+    weekday_lift = pd.crosstab(
+        dated['period'], dated['date'].dt.dayofweek, values=dated['impressions'], aggfunc='mean'
+    ).reindex(index=totals.index, columns=range(7)).div(totals['avg_impressions'], axis=0)
+    weekday_lift.columns = WEEKDAYS
+    weekday_shift = weekday_lift - weekday_lift.iloc[0]
+
+    typed = combined[combined['type'].notna()]
+    type_share = pd.crosstab(typed['period'], typed['type'], normalize='index').reindex(index=totals.index, fill_value=0)
+    type_shift = (type_share - type_share.iloc[0]) * 100
+
+    # Top-post overlap from a period x title presence matrix: the product gives
+    # shared counts for every pair of periods at once.
+    titled = combined[combined['title'] != '']
+    top = titled.sort_values('impressions', ascending=False).groupby('period').head(TOP_POSTS)
+    keys = top['title'].str.casefold().str.replace(r'\s+', ' ', regex=True).str[:80]
+    presence = pd.crosstab(top['period'], keys).reindex(index=totals.index, fill_value=0).clip(upper=1).to_numpy()
+    shared = presence @ presence.T
+    sizes = np.diag(shared)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaccard = shared / (sizes[:, None] + sizes[None, :] - shared)
+
+    periods = []
+    for period, row in totals.iterrows():
+        periods.append({
+            'label': labels[period],
+            'posts': int(row['posts']),
+            'date_range': f"{row['start']:%Y-%m-%d} to {row['end']:%Y-%m-%d}" if pd.notna(row['start']) else 'N/A',
+            'avg_impressions': round(float(row['avg_impressions']), 1),
+            'engagement_rate': None if pd.isna(row['engagement_rate']) else round(float(row['engagement_rate']), 2),
+            'posts_per_week': None if pd.isna(row['posts_per_week']) else round(float(row['posts_per_week']), 1),
+            'impressions_change': None if period == 0 or pd.isna(impressions_change[period]) else round(float(impressions_change[period]), 1),
+            'engagement_rate_change': None if period == 0 or pd.isna(rate_change[period]) else round(float(rate_change[period]), 2),
+            'cadence_change': None if period == 0 or pd.isna(cadence_change[period]) else round(float(cadence_change[period]), 1),
+            'top_post_overlap': None if period == 0 or np.isnan(jaccard[0, period]) else int(shared[0, period])
+        })
+
+    return {
+        'periods': periods,
+        'weekday_shifts': _top_shifts(weekday_shift, labels, lambda day, value: f"{day} {value:+.2f}x"),
+        'type_shifts': _top_shifts(type_shift, labels, lambda name, value: f"{name} {value:+.0f} pts"),
+        'top_posts': TOP_POSTS
+    }
+
+
+def _signed(value, suffix):
+    return 'n/a' if value is None else f"{value:+g}{suffix}"
+
+
+def prompt_fields(result):
+    # One line per period plus the largest shifts, so the prompt grows with the
+    # number of periods and not with the number of posts.
+    baseline = result['periods'][0]['label']
+    lines = []
+    for index, period in enumerate(result['periods'], 1):
+        line = (
+            f"P{index} {period['label']}: {period['date_range']}, {period['posts']} posts, "
+            f"{period['posts_per_week'] or 'n/a'}/week, avg impressions {period['avg_impressions']}, "
+            f"engagement rate {period['engagement_rate'] if period['engagement_rate'] is not None else 'n/a'}%"
+        )
+        if index > 1:
+            line += (
+                f"; vs P1: impressions {_signed(period['impressions_change'], '%')}, "
+                f"engagement rate {_signed(period['engagement_rate_change'], ' pts')}, "
+                f"cadence {_signed(period['cadence_change'], '%')}, "
+                f"{period['top_post_overlap'] if period['top_post_overlap'] is not None else 'n/a'} of top {result['top_posts']} posts shared"
+            )
+        lines.append(line)
+
+    def shift_lines(shifts):
+        return '\n'.join(f"{shift['label']}: {', '.join(shift['changes']) or 'no change'}" for shift in shifts) or 'n/a'
+
+    return {
+        'baseline': baseline,
+        'periods': '\n'.join(lines),
+        'weekday_shifts': shift_lines(result['weekday_shifts']),
+        'type_shifts': shift_lines(result['type_shifts'])
+    }
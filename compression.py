@@ -0,0 +1,80 @@
+import os
+import gzip
+
+import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# gzip/brotli for HTML and JSON responses above a size threshold. Brotli is used
+# when the optional `brotli` package is installed and the client accepts it.
+
+MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '5'))
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/x-ndjson', 'image/svg+xml')
+MAX_STATIC_ENTRIES = 64
+
+_static_cache = {}
+
+
+def _encode(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(request):
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def compress_response(request, response):
+    mimetype = response.mimetype or ''
+    if not mimetype.startswith(COMPRESSIBLE_TYPES):
+        return response
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    if response.is_streamed and not response.direct_passthrough:
+        return response
+    if response.cache_control.no_transform:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request)
+    if encoding is None:
+        return response
+
+    # Static files arrive as passthrough file wrappers; their compressed bytes are
+    # kept per ETag so repeat downloads don't recompress the same stylesheet.
+    etag, weak = response.get_etag()
+    cache_key = (request.path, etag, encoding) if response.direct_passthrough and etag else None
+    compressed = _static_cache.get(cache_key) if cache_key else None
+    if compressed is None:
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        compressed = _encode(data, encoding)
+        if len(compressed) >= len(data):
+            return response
+        metrics.inc('compressed_bytes_saved_total', len(data) - len(compressed), encoding=encoding)
+        if cache_key:
+            if len(_static_cache) >= MAX_STATIC_ENTRIES:
+                _static_cache.clear()
+            _static_cache[cache_key] = compressed
+    else:
+        close = getattr(response.response, 'close', None)
+        if close:
+            response.call_on_close(close)
+        response.direct_passthrough = False
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # The body now differs per encoding, so the validator can only be weak.
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    metrics.inc('compressed_responses_total', encoding=encoding)
+    return response
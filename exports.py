@@ -0,0 +1,72 @@
+import io
+import csv
+import json
+import zipfile
+from datetime import datetime
+
+DRAFT_FIELDS = ('id', 'title', 'content', 'category', 'created_at', 'updated_at')
+CALENDAR_FIELDS = ('id', 'title', 'niche', 'duration', 'content', 'created_at')
+
+# Rows are flushed in batches so each yielded chunk is a reasonable network write.
+BATCH_ROWS = 200
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_stream(records):
+    batch = []
+    for record in records:
+        batch.append(json.dumps({k: _serialize(v) for k, v in record.items()}, ensure_ascii=False))
+        if len(batch) >= BATCH_ROWS:
+            yield ('\n'.join(batch) + '\n').encode('utf-8')
+            batch = []
+    if batch:
+        yield ('\n'.join(batch) + '\n').encode('utf-8')
+
+
+def csv_stream(records, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for count, record in enumerate(records, 1):
+        writer.writerow([_serialize(record[field]) for field in fields])
+        if count % BATCH_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    # Unseekable, so zipfile writes data descriptors instead of seeking back.
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_stream(members):
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in members:
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+    yield sink.drain()
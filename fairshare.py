@@ -0,0 +1,221 @@
+import os
+import time
+import itertools
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import metrics
+
+# Admission control for model calls. Calls wait for one of MODEL_CONCURRENCY
+# slots. Interactive generators are served ahead of standard ones, and those
+# ahead of bulk ones. A class whose oldest call has waited MODEL_QUEUE_AGING
+# seconds is served first, so a steady stream of rewrites cannot starve bulk
+# calls. Bulk calls may hold at most MODEL_BULK_SLOTS slots, so a burst of
+# calendars always leaves room for rewrites. Within a class, users
+# take turns by deficit round-robin weighted by each generator's relative cost.
+# No user holds more than MODEL_USER_CONCURRENCY slots at once.
+
+PRIORITY_CLASSES = ['interactive', 'standard', 'bulk']
+GENERATOR_CLASSES = {
+    'rewrite': 'interactive',
+    'message': 'interactive',
+    'post': 'standard',
+    'carousel': 'standard',
+    'profile': 'standard',
+    'calendar': 'bulk',
+    'analytics': 'bulk',
+    'comparison': 'bulk',
+}
+# Rough cost of a call relative to a rewrite, from typical output sizes.
+GENERATOR_COSTS = {'rewrite': 1, 'message': 1, 'post': 1, 'carousel': 2, 'profile': 2, 'calendar': 4, 'analytics': 2, 'comparison': 2}
+QUANTUM = max(GENERATOR_COSTS.values())
+
+MODEL_CONCURRENCY = int(os.environ.get('MODEL_CONCURRENCY', '8'))
+MODEL_BULK_SLOTS = int(os.environ.get('MODEL_BULK_SLOTS', str(max(MODEL_CONCURRENCY // 2, 1))))
+MODEL_USER_CONCURRENCY = int(os.environ.get('MODEL_USER_CONCURRENCY', '2'))
+MODEL_USER_QUEUE_LIMIT = int(os.environ.get('MODEL_USER_QUEUE_LIMIT', '20'))
+MODEL_QUEUE_TIMEOUT = float(os.environ.get('MODEL_QUEUE_TIMEOUT', '120'))
+MODEL_QUEUE_AGING = float(os.environ.get('MODEL_QUEUE_AGING', '15'))
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class QueueTimeoutError(Exception):
+    pass
+
+
+class Ticket:
+    def __init__(self, user, generator):
+        self.user = user
+        self.generator = generator
+        self.priority = GENERATOR_CLASSES.get(generator, 'standard')
+        self.cost = GENERATOR_COSTS.get(generator, 1)
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class FairScheduler:
+    def __init__(self, slots, bulk_slots, user_slots, user_queue_limit, aging=MODEL_QUEUE_AGING):
+        self.slots = slots
+        self.aging = aging
+        self.class_slots = {'interactive': slots, 'standard': slots, 'bulk': bulk_slots}
+        self.user_slots = user_slots
+        self.user_queue_limit = user_queue_limit
+        self.in_flight = 0
+        self.class_in_flight = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self.user_in_flight = {}
+        # Per class: user -> waiting tickets, in round-robin order.
+        self.queues = {priority: OrderedDict() for priority in PRIORITY_CLASSES}
+        self.deficits = {}
+        self._cond = threading.Condition()
+
+    def _queued_for(self, user):
+        return sum(len(queue.get(user, ())) for queue in self.queues.values())
+
+    def _estimate_position(self, ticket):
+        # Everything waiting in a higher class goes first. In the same class,
+        # each other user gets about as many turns as this user has tickets ahead.
+        ahead = 0
+        for priority in PRIORITY_CLASSES:
+            queue = self.queues[priority]
+            if priority != ticket.priority:
+                ahead += sum(len(waiting) for waiting in queue.values())
+                continue
+            turn = queue[ticket.user].index(ticket) + 1
+            ahead += turn - 1
+            ahead += sum(min(len(waiting), turn) for user, waiting in queue.items() if user != ticket.user)
+            break
+        return ahead + 1
+
+    def _next_ticket(self, priority):
+        queue = self.queues[priority]
+        # Two passes: the first may only top up deficits, the second then serves.
+        for _ in range(2):
+            for user in list(queue):
+                if self.user_in_flight.get(user, 0) >= self.user_slots:
+                    continue
+                waiting = queue[user]
+                key = (priority, user)
+                if self.deficits.get(key, 0) < waiting[0].cost:
+                    self.deficits[key] = self.deficits.get(key, 0) + QUANTUM
+                    queue.move_to_end(user)
+                    continue
+                self.deficits[key] -= waiting[0].cost
+                ticket = waiting.popleft()
+                if not waiting:
+                    del queue[user]
+                    self.deficits.pop(key, None)
+                return ticket
+        return None
+
+    def _class_order(self):
+        now = time.monotonic()
+        aged = [
+            priority for priority in PRIORITY_CLASSES
+            if any(now - waiting[0].enqueued >= self.aging for waiting in self.queues[priority].values())
+        ]
+        return aged + [priority for priority in PRIORITY_CLASSES if priority not in aged]
+
+    def _dispatch(self):
+        granted = False
+        while self.in_flight < self.slots:
+            ticket = None
+            for priority in self._class_order():
+                if self.class_in_flight[priority] < self.class_slots[priority]:
+                    ticket = self._next_ticket(priority)
+                    if ticket:
+                        break
+            if ticket is None:
+                break
+            ticket.granted = True
+            self.in_flight += 1
+            self.class_in_flight[ticket.priority] += 1
+            self.user_in_flight[ticket.user] = self.user_in_flight.get(ticket.user, 0) + 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def acquire(self, user, generator, timeout=None):
+        ticket = Ticket(user, generator)
+        with self._cond:
+            if self._queued_for(user) >= self.user_queue_limit:
+                metrics.inc('model_queue_rejected_total', priority=ticket.priority, reason='full')
+                raise QueueFullError('You have too many requests waiting. Please wait for them to finish.')
+            self.queues[ticket.priority].setdefault(user, deque()).append(ticket)
+            self._dispatch()
+
+            deadline = None if timeout is None else ticket.enqueued + timeout
+            while not ticket.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._withdraw(ticket)
+                    metrics.inc('model_queue_rejected_total', priority=ticket.priority, reason='timeout')
+                    raise QueueTimeoutError('The service is busy right now. Please try again in a minute.')
+                self._cond.wait(remaining)
+
+        metrics.observe('model_queue_wait_seconds', time.monotonic() - ticket.enqueued, priority=ticket.priority)
+        return ticket
+
+    def _withdraw(self, ticket):
+        queue = self.queues[ticket.priority]
+        waiting = queue.get(ticket.user)
+        if waiting is not None and ticket in waiting:
+            waiting.remove(ticket)
+            if not waiting:
+                del queue[ticket.user]
+                self.deficits.pop((ticket.priority, ticket.user), None)
+
+    def release(self, ticket):
+        with self._cond:
+            self.in_flight -= 1
+            self.class_in_flight[ticket.priority] -= 1
+            self.user_in_flight[ticket.user] -= 1
+            if not self.user_in_flight[ticket.user]:
+                del self.user_in_flight[ticket.user]
+            self._dispatch()
+
+    def status(self, user=None):
+        now = time.monotonic()
+        with self._cond:
+            waiting = [ticket for queue in self.queues.values() for tickets in queue.values() for ticket in tickets]
+            snapshot = {
+                'in_flight': self.in_flight,
+                'slots': self.slots,
+                'queued': {priority: sum(len(t) for t in self.queues[priority].values()) for priority in PRIORITY_CLASSES}
+            }
+            if user is not None:
+                snapshot['user_in_flight'] = self.user_in_flight.get(user, 0)
+                snapshot['user_queued'] = [
+                    {
+                        'generator': ticket.generator,
+                        'priority': ticket.priority,
+                        'position': self._estimate_position(ticket),
+                        'waiting_seconds': round(now - ticket.enqueued, 1)
+                    }
+                    for ticket in waiting if ticket.user == user
+                ]
+        return snapshot
+
+
+scheduler = FairScheduler(MODEL_CONCURRENCY, MODEL_BULK_SLOTS, MODEL_USER_CONCURRENCY, MODEL_USER_QUEUE_LIMIT)
+_anonymous_ids = itertools.count(1)
+
+
+@contextmanager
+def slot(user, generator):
+    # Calls made on no user's behalf (scripts, jobs) are each their own tenant
+    # rather than one shared queue.
+    if user is None:
+        user = ('anonymous', next(_anonymous_ids))
+    ticket = scheduler.acquire(user, generator, MODEL_QUEUE_TIMEOUT)
+    try:
+        yield ticket
+    finally:
+        scheduler.release(ticket)
+
+
+def status(user=None):
+    return scheduler.status(user)
@@ -1,15 +1,27 @@
 import os
-import json
+import time
 import logging
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from dotenv import load_dotenv
 
+import circuit
+import fairshare
+import metrics
+import prompts
+import scheduling
+import schemas
+import scoring
+import telemetry
+import trends
+
 load_dotenv()
 
-# Get API key
-api_key = os.getenv("GEMINI_API_KEY")
-_client = genai.Client(api_key=api_key)
+_client = None
+
+MODEL = "gemini-2.5-flash"
+MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", "1"))
+MAX_VARIANTS = 4
 
 def get_client():
     global _client
@@ -17,51 +29,115 @@ def get_client():
     if not api_key:
         return None
     if _client is None:
-        _client = genai.Client(api_key=api_key)
+        # GEMINI_BASE_URL points the SDK at another backend, e.g. gemini_standin.py for load tests.
+        base_url = os.environ.get("GEMINI_BASE_URL")
+        http_options = types.HttpOptions(base_url=base_url) if base_url else None
+        _client = genai.Client(api_key=api_key, http_options=http_options)
     return _client
 
 
+def _generation_config(template, candidate_count=1):
+    # Variants come back as extra candidates of the same call, so the prompt is paid for once.
+    extra = {'candidate_count': candidate_count} if candidate_count > 1 else {}
+    return types.GenerateContentConfig(
+        system_instruction=template.system,
+        response_mime_type="application/json",
+        response_schema=template.response_schema,
+        **extra
+    )
+
+
+def _generate_content(client, generator, prompt, user_id, candidate_count=1):
+    circuit.breaker.allow()
+    reached = False
+    try:
+        config = _generation_config(prompts.PROMPTS[generator], candidate_count)
+        with fairshare.slot(user_id, generator):
+            reached = True
+            return _call_model(client, generator, prompt, user_id, config)
+    finally:
+        # _call_model records a verdict for every call it makes. A call stopped
+        # before then (queue refusal, bad config) must still give back a probe.
+        if not reached:
+            circuit.breaker.release_probe()
+
+
+def _backend_failed(error):
+    # Bad requests say nothing about backend health; rate limits and server errors do.
+    if error is None:
+        return False
+    if isinstance(error, errors.ClientError):
+        return error.code == 429
+    return True
+
+
+def _call_model(client, generator, prompt, user_id, config):
+    started = time.perf_counter()
+    response = None
+    error = None
+    retries = 0
+    try:
+        while True:
+            try:
+                with metrics.timer('model_call_duration_seconds', generator=generator):
+                    response = client.models.generate_content(
+                        model=MODEL,
+                        contents=prompt,
+                        config=config
+                    )
+                return response
+            except errors.ServerError:
+                if retries >= MAX_RETRIES:
+                    raise
+                retries += 1
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        latency = time.perf_counter() - started
+        circuit.breaker.record(not _backend_failed(error), latency)
+        telemetry.record_call(generator, user_id, prompt, response, latency, retries, error)
+
+
+def _decode_variants(schema, response, generator):
+    variants = []
+    for candidate in response.candidates or []:
+        parts = candidate.content.parts if candidate.content and candidate.content.parts else []
+        try:
+            variants.append(schemas.decode_response(schema, ''.join(part.text for part in parts if part.text), generator))
+        except ValueError as e:
+            logging.error(f"Dropping {generator} variant: {e}")
+    if not variants:
+        raise ValueError('The model returned no usable variants. Please try again.')
+    return variants
+
+
+def _best_variant(ranked):
+    result = dict(ranked[0])
+    result['variants'] = ranked
+    return result
+
+
 def check_api_key():
     return os.environ.get("GEMINI_API_KEY") is not None
 
 
-def generate_linkedin_post(topic, niche, tone, length, include_carousel=False):
+@circuit.serve_stale('post')
+def generate_linkedin_post(topic, niche, tone, length, include_carousel=False, variants=1, user_id=None):
     length_guide = {
         'short': '50-100 words',
         'medium': '150-250 words',
         'long': '300-500 words'
     }
     
-    prompt = f"""You are an expert LinkedIn content strategist. Generate a high-performing LinkedIn post.
-
-Topic: {topic}
-Niche/Industry: {niche}
-Tone: {tone}
-Target Length: {length_guide.get(length, '150-250 words')}
-
-Create a LinkedIn post with the following structure:
-
-1. HOOK (First 2-3 lines that grab attention - this appears before "...see more")
-2. BODY (Main content with insights, story, or value)
-3. CTA (Call-to-action to encourage engagement)
-
-{'Also provide a 5-slide carousel outline based on this topic.' if include_carousel else ''}
-
-Format your response as JSON with the following structure:
-{{
-    "hook": "The attention-grabbing opening lines",
-    "body": "The main content of the post",
-    "cta": "The call-to-action",
-    "full_post": "The complete post ready to copy",
-    "carousel": ["Slide 1 content", "Slide 2 content", ...] (only if carousel requested)
-}}
-
-Make the content:
-- Authentic and personal
-- Value-driven with actionable insights
-- Formatted with line breaks for readability
-- Include relevant emojis sparingly
-- Optimized for LinkedIn's algorithm"""
+    prompt = prompts.render(
+        'post',
+        topic=topic,
+        niche=niche,
+        tone=tone,
+        target_length=length_guide.get(length, '150-250 words'),
+        carousel_instruction='Also provide a 5-slide carousel outline based on this topic.' if include_carousel else ''
+    )
 
     try:
         client = get_client()
@@ -74,17 +150,12 @@ Make the content:
                 "full_post": "Please configure your Gemini API key to use AI features."
             }
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
-        )
+        variants = max(1, min(variants, MAX_VARIANTS))
+        response = _generate_content(client, 'post', prompt, user_id, candidate_count=variants)
+        if variants > 1:
+            return _best_variant(scoring.rank(_decode_variants(schemas.PostResult, response, 'post'), 'full_post', 'hook'))
         
-        if response.text:
-            result = json.loads(response.text)
-            return result
+        return schemas.decode_response(schemas.PostResult, response.text, 'post')
     except Exception as e:
         logging.error(f"Error generating post: {e}")
         return {
@@ -96,28 +167,9 @@ Make the content:
         }
 
 
-def rewrite_content(original_content, target_tone):
-    prompt = f"""You are a LinkedIn content optimization expert. Rewrite the following content to be more engaging and professional for LinkedIn.
-
-Original Content:
-{original_content}
-
-Target Tone: {target_tone}
-
-Rewrite this content with:
-1. A strong hook that grabs attention
-2. Clear structure with line breaks
-3. Professional yet authentic voice
-4. Improved clarity and impact
-5. LinkedIn-optimized formatting
-6. Appropriate use of emojis (sparingly)
-
-Format your response as JSON:
-{{
-    "rewritten_content": "The fully rewritten content",
-    "improvements_made": ["List of improvements made"],
-    "engagement_tips": ["Tips for better engagement"]
-}}"""
+@circuit.serve_stale('rewrite')
+def rewrite_content(original_content, target_tone, user_id=None):
+    prompt = prompts.render('rewrite', original_content=original_content, target_tone=target_tone)
 
     try:
         client = get_client()
@@ -129,16 +181,9 @@ Format your response as JSON:
                 "engagement_tips": []
             }
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
-        )
+        response = _generate_content(client, 'rewrite', prompt, user_id)
         
-        if response.text:
-            return json.loads(response.text)
+        return schemas.decode_response(schemas.RewriteResult, response.text, 'rewrite')
     except Exception as e:
         logging.error(f"Error rewriting content: {e}")
         return {
@@ -149,36 +194,9 @@ Format your response as JSON:
         }
 
 
-def generate_carousel(topic, niche):
-    prompt = f"""You are a LinkedIn carousel content expert. Create a compelling 5-slide carousel outline.
-
-Topic: {topic}
-Niche/Industry: {niche}
-
-Create a carousel with this structure:
-- Slide 1: Hook (Attention-grabbing title/question)
-- Slide 2: Problem (Pain point your audience faces)
-- Slide 3: Insight (Key realization or data point)
-- Slide 4: Solution (Your answer or framework)
-- Slide 5: CTA (Call-to-action)
-
-Format your response as JSON:
-{{
-    "title": "Carousel title",
-    "slides": [
-        {{"slide_number": 1, "type": "Hook", "headline": "...", "content": "...", "design_tip": "..."}},
-        {{"slide_number": 2, "type": "Problem", "headline": "...", "content": "...", "design_tip": "..."}},
-        {{"slide_number": 3, "type": "Insight", "headline": "...", "content": "...", "design_tip": "..."}},
-        {{"slide_number": 4, "type": "Solution", "headline": "...", "content": "...", "design_tip": "..."}},
-        {{"slide_number": 5, "type": "CTA", "headline": "...", "content": "...", "design_tip": "..."}}
-    ],
-    "caption": "Suggested LinkedIn caption for the carousel post"
-}}
-
-Make each slide:
-- Concise and scannable
-- Visually describable
-- Value-packed"""
+@circuit.serve_stale('carousel')
+def generate_carousel(topic, niche, user_id=None):
+    prompt = prompts.render('carousel', topic=topic, niche=niche)
 
     try:
         client = get_client()
@@ -190,16 +208,9 @@ Make each slide:
                 "caption": "Please configure your Gemini API key to use AI features."
             }
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
-        )
+        response = _generate_content(client, 'carousel', prompt, user_id)
         
-        if response.text:
-            return json.loads(response.text)
+        return schemas.decode_response(schemas.CarouselResult, response.text, 'carousel')
     except Exception as e:
         logging.error(f"Error generating carousel: {e}")
         return {
@@ -210,39 +221,15 @@ Make each slide:
         }
 
 
-def optimize_profile(about, headline, experience, skills):
-    prompt = f"""You are a LinkedIn profile optimization expert. Analyze and improve the following LinkedIn profile sections.
-
-Current About Section:
-{about if about else 'Not provided'}
-
-Current Headline:
-{headline if headline else 'Not provided'}
-
-Current Experience:
-{experience if experience else 'Not provided'}
-
-Current Skills:
-{skills if skills else 'Not provided'}
-
-Provide optimized versions with:
-1. Keyword optimization for LinkedIn search
-2. Clear value proposition
-3. Engaging storytelling
-4. Professional tone
-5. Strong calls-to-action
-
-For experience, use the STAR method (Situation, Task, Action, Result).
-
-Format your response as JSON:
-{{
-    "optimized_about": "Improved About section (max 2600 characters)",
-    "headline_variations": ["5 different headline options"],
-    "optimized_experience": "Improved experience using STAR method",
-    "skills_suggestions": ["10 relevant skills to add"],
-    "profile_tips": ["5 additional profile optimization tips"],
-    "keyword_suggestions": ["Relevant keywords to include"]
-}}"""
+@circuit.serve_stale('profile')
+def optimize_profile(about, headline, experience, skills, user_id=None):
+    prompt = prompts.render(
+        'profile',
+        about=about if about else 'Not provided',
+        headline=headline if headline else 'Not provided',
+        experience=experience if experience else 'Not provided',
+        skills=skills if skills else 'Not provided'
+    )
 
     try:
         client = get_client()
@@ -257,16 +244,9 @@ Format your response as JSON:
                 "keyword_suggestions": []
             }
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
-        )
+        response = _generate_content(client, 'profile', prompt, user_id)
         
-        if response.text:
-            return json.loads(response.text)
+        return schemas.decode_response(schemas.ProfileResult, response.text, 'profile')
     except Exception as e:
         logging.error(f"Error optimizing profile: {e}")
         return {
@@ -280,7 +260,8 @@ Format your response as JSON:
         }
 
 
-def generate_networking_message(message_type, tone, context, recipient_info):
+@circuit.serve_stale('message')
+def generate_networking_message(message_type, tone, context, recipient_info, variants=1, user_id=None):
     message_templates = {
         'recruiter_outreach': 'Reaching out to a recruiter about job opportunities',
         'referral_request': 'Asking someone for a referral to a company',
@@ -290,29 +271,13 @@ def generate_networking_message(message_type, tone, context, recipient_info):
         'client_pitch': 'Pitching services to a potential client'
     }
     
-    prompt = f"""You are a LinkedIn networking expert. Generate a personalized outreach message.
-
-Message Type: {message_templates.get(message_type, message_type)}
-Tone: {tone}
-Context/Goal: {context if context else 'General networking'}
-Recipient Information: {recipient_info if recipient_info else 'Not specified'}
-
-Create a message that:
-1. Has a personalized opening (not generic)
-2. Shows genuine interest or value
-3. Is concise (under 300 characters for connection requests, under 500 for InMail)
-4. Has a clear but soft call-to-action
-5. Avoids being salesy or pushy
-
-Format your response as JSON:
-{{
-    "subject_line": "For InMail (optional)",
-    "message": "The full message",
-    "connection_note": "Shorter version for connection request (under 300 chars)",
-    "follow_up_message": "Suggested follow-up if no response",
-    "personalization_tips": ["Tips to further personalize"],
-    "what_not_to_do": ["Common mistakes to avoid"]
-}}"""
+    prompt = prompts.render(
+        'message',
+        message_type=message_templates.get(message_type, message_type),
+        tone=tone,
+        context=context if context else 'General networking',
+        recipient_info=recipient_info if recipient_info else 'Not specified'
+    )
 
     try:
         client = get_client()
@@ -326,16 +291,17 @@ Format your response as JSON:
                 "what_not_to_do": []
             }
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
-        )
+        variants = max(1, min(variants, MAX_VARIANTS))
+        response = _generate_content(client, 'message', prompt, user_id, candidate_count=variants)
+        if variants > 1:
+            return _best_variant(scoring.rank(
+                _decode_variants(schemas.MessageResult, response, 'message'),
+                'message',
+                targets=scoring.MESSAGE_TARGETS,
+                weights=scoring.MESSAGE_WEIGHTS
+            ))
         
-        if response.text:
-            return json.loads(response.text)
+        return schemas.decode_response(schemas.MessageResult, response.text, 'message')
     except Exception as e:
         logging.error(f"Error generating message: {e}")
         return {
@@ -348,50 +314,18 @@ Format your response as JSON:
         }
 
 
-def generate_content_calendar(niche, duration, goals):
+@circuit.serve_stale('calendar')
+def generate_content_calendar(niche, duration, goals, profile=None, user_id=None):
     weeks = 4 if duration == 'monthly' else 1
-    
-    prompt = f"""You are a LinkedIn content strategist. Create a detailed content calendar.
-
-Niche/Industry: {niche}
-Duration: {duration} ({weeks} week(s))
-Goals: {goals if goals else 'Increase engagement and build personal brand'}
-
-Create a content calendar with:
-1. Specific post topics for each day
-2. Content type variety (text, carousel, poll, video idea)
-3. Best posting times
-4. Hashtag suggestions
-5. Engagement strategy
-
-Format your response as JSON:
-{{
-    "calendar_title": "Title for this content plan",
-    "strategy_overview": "Brief strategy explanation",
-    "weeks": [
-        {{
-            "week_number": 1,
-            "theme": "Weekly theme",
-            "days": [
-                {{
-                    "day": "Monday",
-                    "post_type": "Text/Carousel/Poll/Video",
-                    "topic": "Specific topic",
-                    "hook_idea": "Opening hook suggestion",
-                    "best_time": "Suggested posting time in IST (e.g., 10:30 AM IST)",
-                    "hashtags": ["relevant", "hashtags"],
-                    "engagement_tip": "How to boost engagement"
-                }}
-            ]
-        }}
-    ],
-    "content_pillars": ["Main content themes to rotate"],
-    "monthly_goals": ["Specific measurable goals"],
-    "pro_tips": ["Additional strategy tips"]
-}}
-
-Include posts for {weeks * 5} weekdays (Monday-Friday).
-Make content ideas specific and actionable."""
+    skeleton = scheduling.build_skeleton(profile, weeks)
+
+    prompt = prompts.render(
+        'calendar',
+        niche=niche,
+        post_count=sum(len(week) for week in skeleton),
+        schedule=scheduling.describe(skeleton),
+        goals=goals if goals else 'Increase engagement and build personal brand'
+    )
 
     try:
         client = get_client()
@@ -405,16 +339,12 @@ Make content ideas specific and actionable."""
                 "pro_tips": []
             }
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
-        )
+        response = _generate_content(client, 'calendar', prompt, user_id)
         
-        if response.text:
-            return json.loads(response.text)
+        plan = schemas.decode_response(schemas.CalendarPlan, response.text, 'calendar')
+        result = scheduling.fill_skeleton(skeleton, plan)
+        result['schedule_posts'] = profile['posts'] if profile else 0
+        return result
     except Exception as e:
         logging.error(f"Error generating calendar: {e}")
         return {
@@ -427,41 +357,23 @@ Make content ideas specific and actionable."""
         }
 
 
-def generate_analytics_recommendations(analysis_data):
-    prompt = f"""You are a LinkedIn analytics expert. Analyze this LinkedIn performance data and provide strategic recommendations.
-
-Analytics Summary:
-- Total Posts: {analysis_data.get('total_posts', 0)}
-- Date Range: {analysis_data.get('date_range', 'N/A')}
-- Average Impressions: {analysis_data.get('avg_impressions', 0)}
-- Average Reactions: {analysis_data.get('avg_reactions', 0)}
-- Average Comments: {analysis_data.get('avg_comments', 0)}
-- Average Shares: {analysis_data.get('avg_shares', 0)}
-- Engagement Rate: {analysis_data.get('engagement_rate', 0)}%
-- Best Performing Day: {analysis_data.get('best_day', 'N/A')}
-- Best Content Type: {analysis_data.get('best_content_type', 'N/A')}
-
-Top Performing Posts:
-{json.dumps(analysis_data.get('top_posts', []), indent=2)}
-
-Provide comprehensive recommendations:
-
-Format your response as JSON:
-{{
-    "performance_summary": "Overall performance assessment",
-    "strengths": ["What's working well"],
-    "areas_for_improvement": ["What needs work"],
-    "reach_recommendations": ["How to increase reach"],
-    "timing_recommendations": ["Best times and days to post"],
-    "content_recommendations": ["Content type and topic suggestions"],
-    "hook_suggestions": ["5 hook templates based on top performers"],
-    "what_to_avoid": ["Things to stop doing"],
-    "next_7_post_ideas": [
-        {{"day": 1, "topic": "...", "type": "...", "hook": "..."}}
-    ],
-    "engagement_tactics": ["Ways to boost engagement"],
-    "growth_forecast": "Expected improvement if recommendations followed"
-}}"""
+@circuit.serve_stale('analytics')
+def generate_analytics_recommendations(analysis_data, user_id=None):
+    prompt = prompts.render(
+        'analytics',
+        total_posts=analysis_data.get('total_posts', 0),
+        date_range=analysis_data.get('date_range', 'N/A'),
+        avg_impressions=analysis_data.get('avg_impressions', 0),
+        avg_reactions=analysis_data.get('avg_reactions', 0),
+        avg_comments=analysis_data.get('avg_comments', 0),
+        avg_shares=analysis_data.get('avg_shares', 0),
+        engagement_rate=analysis_data.get('engagement_rate', 0),
+        best_day=analysis_data.get('best_day', 'N/A'),
+        best_content_type=analysis_data.get('best_content_type', 'N/A'),
+        features=trends.describe(analysis_data.get('trend_features') or {}),
+        outliers=trends.describe_outliers(analysis_data.get('outliers', [])),
+        top_posts=prompts.compact_json(analysis_data.get('top_posts', []))
+    )
 
     try:
         client = get_client()
@@ -481,16 +393,9 @@ Format your response as JSON:
                 "growth_forecast": ""
             }
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
-        )
+        response = _generate_content(client, 'analytics', prompt, user_id)
         
-        if response.text:
-            return json.loads(response.text)
+        return schemas.decode_response(schemas.AnalyticsResult, response.text, 'analytics')
     except Exception as e:
         logging.error(f"Error generating recommendations: {e}")
         return {
@@ -506,4 +411,35 @@ Format your response as JSON:
             "next_7_post_ideas": [],
             "engagement_tactics": [],
             "growth_forecast": ""
-        }
\ No newline at end of file
+        }
+
+
+@circuit.serve_stale('comparison')
+def generate_comparison_insights(comparison_fields, user_id=None):
+    prompt = prompts.render('comparison', **comparison_fields)
+
+    try:
+        client = get_client()
+        if client is None:
+            return {
+                "error": "API key not configured. Please add your Gemini API key.",
+                "comparison_summary": "Please configure your Gemini API key to use AI features.",
+                "key_changes": [],
+                "likely_causes": [],
+                "keep_doing": [],
+                "change_next": []
+            }
+
+        response = _generate_content(client, 'comparison', prompt, user_id)
+
+        return schemas.decode_response(schemas.ComparisonResult, response.text, 'comparison')
+    except Exception as e:
+        logging.error(f"Error generating comparison insights: {e}")
+        return {
+            "error": str(e),
+            "comparison_summary": "Error comparing periods. Please try again.",
+            "key_changes": [],
+            "likely_causes": [],
+            "keep_doing": [],
+            "change_next": []
+        }
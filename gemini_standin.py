@@ -0,0 +1,144 @@
+import re
+import json
+import math
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline stand-in for the Gemini REST API. Point the app at it with
+# GEMINI_BASE_URL=http://127.0.0.1:8089 and any GEMINI_API_KEY; responses are
+# generated from the request's responseSchema so every generator gets valid JSON.
+
+DEFAULT_LIST_LENGTH = 3
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+def _list_length(schema):
+    match = re.match(r'(?:Exactly )?(\d+)\b', schema.get('description', ''))
+    return int(match.group(1)) if match else DEFAULT_LIST_LENGTH
+
+
+def sample_value(schema, name, topic, index=0):
+    kind = schema.get('type', 'STRING').upper()
+    if kind == 'OBJECT':
+        return {
+            key: sample_value(prop, key, topic, index)
+            for key, prop in schema.get('properties', {}).items()
+        }
+    if kind == 'ARRAY':
+        return [
+            sample_value(schema.get('items', {}), name, topic, i)
+            for i in range(_list_length(schema))
+        ]
+    if kind in ('INTEGER', 'NUMBER'):
+        return index + 1
+    if kind == 'BOOLEAN':
+        return index % 2 == 0
+    if name == 'day':
+        return WEEKDAYS[index % len(WEEKDAYS)]
+    label = name.replace('_', ' ')
+    return f"Stand-in {label} {index + 1} about {topic}" if topic else f"Stand-in {label} {index + 1}"
+
+
+def _prompt_text(body):
+    parts = []
+    for content in body.get('contents', []):
+        parts.extend(part.get('text', '') for part in content.get('parts', []))
+    return '\n'.join(parts)
+
+
+def build_response(body):
+    prompt = _prompt_text(body)
+    match = re.search(r'^(?:Topic|Niche/Industry): (.+)$', prompt, re.M)
+    topic = match.group(1).strip()[:60] if match else ''
+
+    config = body.get('generationConfig', {})
+    schema = config.get('responseSchema')
+    count = max(int(config.get('candidateCount') or 1), 1)
+
+    candidates = []
+    for index in range(count):
+        subject = f"{topic} (variant {index + 1})" if count > 1 else topic
+        if schema:
+            payload = sample_value(schema, 'result', subject)
+        else:
+            payload = {'text': f"Stand-in response about {subject}".strip()}
+        candidates.append({
+            'content': {'parts': [{'text': json.dumps(payload)}], 'role': 'model'},
+            'finishReason': 'STOP',
+            'index': index
+        })
+
+    prompt_tokens = len(prompt) // 4
+    output_tokens = sum(len(c['content']['parts'][0]['text']) for c in candidates) // 4
+    return {
+        'candidates': candidates,
+        'usageMetadata': {
+            'promptTokenCount': prompt_tokens,
+            'candidatesTokenCount': output_tokens,
+            'totalTokenCount': prompt_tokens + output_tokens
+        },
+        'modelVersion': 'standin'
+    }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+
+        if ':generateContent' not in self.path:
+            return self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+
+        time.sleep(server.rng.lognormvariate(server.latency_mu, server.latency_sigma))
+        if server.rng.random() < server.error_rate:
+            return self._send_json(503, {
+                'error': {'code': 503, 'message': 'The model is overloaded.', 'status': 'UNAVAILABLE'}
+            })
+        self._send_json(200, build_response(body))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=8089, latency_ms=800, latency_sigma=0.5, error_rate=0.0, seed=None):
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.latency_mu = math.log(max(latency_ms, 1) / 1000)
+    server.latency_sigma = latency_sigma
+    server.error_rate = error_rate
+    server.rng = random.Random(seed)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Gemini API stand-in for load testing.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=800, help='median response latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='log-normal spread of latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls that return 503')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency_ms, args.latency_sigma, args.error_rate, args.seed)
+    print(f"Gemini stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
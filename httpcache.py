@@ -0,0 +1,124 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from werkzeug.http import is_resource_modified
+
+import metrics
+
+# Conditional GETs for per-user pages, fingerprinted static URLs and a per-user
+# cache of rendered template fragments.
+
+STATIC_MAX_AGE = 365 * 24 * 3600
+MAX_CACHED_USERS = 256
+MAX_FRAGMENTS_PER_USER = 32
+
+_lock = threading.Lock()
+_fingerprints = {}
+_fragments = OrderedDict()
+_build_id = None
+
+
+def fingerprint(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:12]
+    _fingerprints[path] = (key, digest)
+    return digest
+
+
+def static_url_defaults(app, endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        digest = fingerprint(os.path.join(app.static_folder, values['filename']))
+        if digest:
+            values['v'] = digest
+
+
+def apply_static_caching(app, request, response):
+    # Only a URL whose fingerprint matches the file on disk may be cached forever;
+    # stale fingerprints fall back to the default revalidating headers.
+    version = request.args.get('v')
+    filename = (request.view_args or {}).get('filename')
+    if response.status_code == 200 and version and filename:
+        if version == fingerprint(os.path.join(app.static_folder, filename)):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+            response.cache_control.immutable = True
+    return response
+
+
+def build_id(app):
+    # Templates and the css/js they link to; a deploy changes every page ETag.
+    global _build_id
+    if _build_id is None:
+        digest = hashlib.md5()
+        folders = [app.template_folder, os.path.join(app.static_folder, 'css'), os.path.join(app.static_folder, 'js')]
+        for folder in folders:
+            folder = os.path.join(app.root_path, folder)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                digest.update(f"{name}:{fingerprint(os.path.join(folder, name))}".encode('utf-8'))
+        _build_id = digest.hexdigest()[:12]
+    return _build_id
+
+
+def page_etag(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def is_not_modified(request, etag, last_modified):
+    # werkzeug lets If-None-Match override If-Modified-Since, which matters here:
+    # deletes don't move the last-modified timestamp, but they do change the ETag.
+    not_modified = not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+    metrics.record_cache('page', not_modified)
+    return not_modified
+
+
+def mark_revalidate(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+
+def fragment(user_id, key, version, render):
+    # The content version is part of the entry, so a write made through another
+    # worker process is never served stale; invalidate() just frees memory early.
+    with _lock:
+        entries = _fragments.get(user_id)
+        cached = entries.get(key) if entries is not None else None
+        if cached is not None and cached[0] == version:
+            _fragments.move_to_end(user_id)
+            entries.move_to_end(key)
+            metrics.record_cache('fragment', True)
+            return cached[1]
+
+    metrics.record_cache('fragment', False)
+    html = render()
+    with _lock:
+        entries = _fragments.setdefault(user_id, OrderedDict())
+        entries[key] = (version, html)
+        while len(entries) > MAX_FRAGMENTS_PER_USER:
+            entries.popitem(last=False)
+        _fragments.move_to_end(user_id)
+        while len(_fragments) > MAX_CACHED_USERS:
+            _fragments.popitem(last=False)
+    return html
+
+
+def invalidate(user_id):
+    with _lock:
+        _fragments.pop(user_id, None)
@@ -0,0 +1,185 @@
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import http.cookiejar
+from collections import defaultdict
+
+# Drives the Flask routes at fixed concurrency levels and reports throughput and
+# latency percentiles. Run the app against gemini_standin.py so no quota is spent:
+#
+#   python gemini_standin.py --latency-ms 800 --error-rate 0.02 &
+#   GEMINI_API_KEY=standin GEMINI_BASE_URL=http://127.0.0.1:8089 \
+#       SQLALCHEMY_DATABASE_URI=sqlite:///loadtest.db python app.py &
+#   python loadtest.py --concurrency 1 4 16 --duration 30
+
+SAMPLE_CSV = "date,impressions,reactions,comments,shares,type,title\n" + "\n".join(
+    f"2025-0{1 + i % 9}-{10 + i % 18},{1000 + i * 37},{20 + i},{i % 7},{i % 3},{['Text', 'Carousel', 'Poll'][i % 3]},Post {i}"
+    for i in range(60)
+)
+
+
+def _form(**fields):
+    return urllib.parse.urlencode(fields).encode('utf-8'), 'application/x-www-form-urlencoded'
+
+
+def _json(**fields):
+    return json.dumps(fields).encode('utf-8'), 'application/json'
+
+
+def _upload(field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+        f"{content}\r\n"
+        f"--{boundary}--\r\n"
+    ).encode('utf-8')
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+SCENARIOS = {
+    'dashboard': ('GET', '/dashboard', None),
+    'drafts': ('GET', '/drafts', None),
+    'save-draft': ('POST', '/save-draft', lambda: _json(title='Load test', content='Draft body ' * 20, category='post')),
+    'post-generator': ('POST', '/post-generator', lambda: _form(topic='Remote work lessons', niche='Tech', tone='professional', length='medium')),
+    'content-rewriter': ('POST', '/content-rewriter', lambda: _form(original_content='We shipped a thing today. ' * 10, target_tone='inspiring')),
+    'message-generator': ('POST', '/message-generator', lambda: _form(message_type='referral_request', tone='professional', context='Backend role', recipient_info='Engineering manager')),
+    'calendar-generator': ('POST', '/calendar-generator', lambda: _form(niche='Data engineering', duration='weekly', goals='Grow followers')),
+    'analytics': ('POST', '/analytics', lambda: _upload('analytics_file', 'export.csv', SAMPLE_CSV)),
+}
+
+
+class Session:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, path, payload=None):
+        data, content_type = payload if payload else (None, None)
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if content_type:
+            req.add_header('Content-Type', content_type)
+        try:
+            with self.opener.open(req, timeout=120) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 0
+
+    def login(self):
+        email = f"loadtest-{uuid.uuid4().hex[:12]}@example.com"
+        self.request('POST', '/signup', _form(name='Load Test', email=email, password='loadtest', confirm_password='loadtest'))
+        self.request('POST', '/login', _form(email=email, password='loadtest'))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def run_level(base_url, concurrency, duration, scenarios, seed):
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    window = {}
+
+    def start_clock():
+        window['started'] = time.perf_counter()
+        window['deadline'] = window['started'] + duration
+
+    # Signups and bcrypt logins finish before the clock starts, so they are
+    # neither timed nor counted against the duration.
+    ready = threading.Barrier(concurrency, action=start_clock)
+
+    def worker(worker_id):
+        session = Session(base_url)
+        session.login()
+        rng = random.Random(seed + worker_id)
+        ready.wait()
+        while time.perf_counter() < window['deadline']:
+            name = rng.choice(scenarios)
+            method, path, payload = SCENARIOS[name]
+            started = time.perf_counter()
+            status = session.request(method, path, payload() if payload else None)
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples[name].append(elapsed)
+                if not 200 <= status < 400:
+                    errors[name] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - window['started']
+
+    routes = {}
+    for name, values in sorted(samples.items()):
+        values.sort()
+        routes[name] = {
+            'requests': len(values),
+            'errors': errors[name],
+            'throughput_rps': round(len(values) / wall, 2),
+            'p50_ms': round(percentile(values, 50) * 1000, 1),
+            'p95_ms': round(percentile(values, 95) * 1000, 1),
+            'p99_ms': round(percentile(values, 99) * 1000, 1),
+        }
+    all_values = sorted(v for values in samples.values() for v in values)
+    return {
+        'concurrency': concurrency,
+        'wall_seconds': round(wall, 2),
+        'requests': len(all_values),
+        'errors': sum(errors.values()),
+        'throughput_rps': round(len(all_values) / wall, 2),
+        'p50_ms': round(percentile(all_values, 50) * 1000, 1),
+        'p95_ms': round(percentile(all_values, 95) * 1000, 1),
+        'p99_ms': round(percentile(all_values, 99) * 1000, 1),
+        'routes': routes,
+    }
+
+
+def print_report(result):
+    header = f"{'route':<20}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(f"\nconcurrency={result['concurrency']}  wall={result['wall_seconds']}s")
+    print(header)
+    print('-' * len(header))
+    for name, row in list(result['routes'].items()) + [('TOTAL', result)]:
+        print(f"{name:<20}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>9}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Creator Tales Flask routes.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--duration', type=float, default=30, help='seconds per concurrency level')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json-out', help='write the results to this file as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for level in args.concurrency:
+        result = run_level(args.base_url, level, args.duration, args.scenarios, args.seed)
+        print_report(result)
+        results.append(result)
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
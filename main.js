@@ -80,6 +80,30 @@ function showNotification(message, type) {
   }, 3000);
 }
 
+function postDraft(payload, successMessage) {
+  return fetch('/save-draft', {
+      method: 'POST',
+      headers: {
+          'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(payload)
+  })
+  .then(response => response.json())
+  .then(data => {
+      if (data.success) {
+          showNotification(successMessage || 'Draft saved successfully!', 'success');
+      } else if (data.duplicate) {
+          const percent = Math.round(data.duplicate.similarity * 100);
+          if (confirm(`This looks ${percent}% similar to your draft "${data.duplicate.title}". Save anyway?`)) {
+              postDraft(Object.assign({}, payload, { force: true }), successMessage);
+          }
+      } else {
+          showNotification(data.message || 'Error saving draft', 'error');
+      }
+      return data;
+  });
+}
+
 function copyToClipboard(elementId) {
   const element = document.getElementById(elementId);
   if (element) {
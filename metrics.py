@@ -0,0 +1,114 @@
+import time
+import threading
+from contextlib import contextmanager
+
+PREFIX = 'creator_tales_'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+HELP = {
+    'request_duration_seconds': 'HTTP request latency by route.',
+    'db_query_duration_seconds': 'Time spent executing database statements.',
+    'db_query_errors_total': 'Database statements that raised, by statement type.',
+    'model_call_duration_seconds': 'Time spent waiting on the Gemini API.',
+    'model_queue_wait_seconds': 'Time model calls spent queued for a slot by priority class.',
+    'model_queue_rejected_total': 'Model calls refused by the fair-share queue by priority class and reason.',
+    'circuit_transitions_total': 'Circuit breaker state changes by circuit and new state.',
+    'circuit_rejected_total': 'Model calls refused while the circuit was open.',
+    'stale_results_total': 'Degraded-mode lookups of last good results by generator and result.',
+    'stale_refreshes_total': 'Stale results regenerated in the background after recovery.',
+    'analysis_duration_seconds': 'Time spent in pandas analytics processing.',
+    'chart_render_duration_seconds': 'Time spent rendering analytics charts.',
+    'artifact_write_duration_seconds': 'Time spent writing artifacts to storage by backend.',
+    'cache_requests_total': 'Cache lookups by cache and result.',
+    'response_decode_total': 'Model responses decoded by generator and outcome.',
+    'compressed_responses_total': 'Responses sent gzip or brotli encoded.',
+    'compressed_bytes_saved_total': 'Bytes saved by response compression.',
+}
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def observe(name, value, **labels):
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        state = series.get(_key(labels))
+        if state is None:
+            state = series[_key(labels)] = {'buckets': [0] * len(DEFAULT_BUCKETS), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                state['buckets'][i] += 1
+        state['sum'] += value
+        state['count'] += 1
+
+
+def inc(name, amount=1, **labels):
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[_key(labels)] = series.get(_key(labels), 0) + amount
+
+
+def record_cache(cache, hit):
+    inc('cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+
+@contextmanager
+def timer(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    lines = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            full_name = PREFIX + name
+            lines.append(f'# HELP {full_name} {HELP.get(name, name)}')
+            lines.append(f'# TYPE {full_name} counter')
+            for labels, value in sorted(series.items()):
+                lines.append(f'{full_name}{_format_labels(labels)} {_format_value(value)}')
+
+        for name, series in sorted(_histograms.items()):
+            full_name = PREFIX + name
+            lines.append(f'# HELP {full_name} {HELP.get(name, name)}')
+            lines.append(f'# TYPE {full_name} histogram')
+            for labels, state in sorted(series.items()):
+                for bound, count in zip(DEFAULT_BUCKETS, state['buckets']):
+                    lines.append(f'{full_name}_bucket{_format_labels(labels, {"le": bound})} {count}')
+                lines.append(f'{full_name}_bucket{_format_labels(labels, {"le": "+Inf"})} {state["count"]}')
+                lines.append(f'{full_name}_sum{_format_labels(labels)} {_format_value(state["sum"])}')
+                lines.append(f'{full_name}_count{_format_labels(labels)} {state["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def totals(name):
+    with _lock:
+        series = _histograms.get(name, {})
+        return {labels: (state['count'], state['sum']) for labels, state in series.items()}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
@@ -0,0 +1,90 @@
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline stand-in for an S3-compatible object store such as MinIO. Run it and
+# start the app with ARTIFACT_STORAGE=object OBJECT_STORE_ENDPOINT=http://127.0.0.1:9000;
+# objects live in memory and any SigV4-signed request is accepted.
+
+
+class ObjectStoreHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, data=b'', content_type='application/xml'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def _error(self, status, code):
+        self._send(status, f"<Error><Code>{code}</Code></Error>".encode('utf-8'))
+
+    def _authorized(self):
+        return self.headers.get('Authorization', '').startswith('AWS4-HMAC-SHA256 Credential=')
+
+    def do_PUT(self):
+        length = int(self.headers.get('Content-Length', 0))
+        data = self.rfile.read(length)
+        if not self._authorized():
+            return self._error(403, 'AccessDenied')
+        if self.headers.get('x-amz-content-sha256') != hashlib.sha256(data).hexdigest():
+            return self._error(400, 'XAmzContentSHA256Mismatch')
+
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.objects[self.path] = (data, self.headers.get('Content-Type', 'application/octet-stream'))
+        self._send(200)
+
+    def do_GET(self):
+        if not self._authorized():
+            return self._error(403, 'AccessDenied')
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            stored = self.server.objects.get(self.path)
+        if stored is None:
+            return self._error(404, 'NoSuchKey')
+        self._send(200, stored[0], stored[1])
+
+    do_HEAD = do_GET
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return self._error(403, 'AccessDenied')
+        with self.server.lock:
+            self.server.objects.pop(self.path, None)
+        self._send(204)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=9000, latency_ms=20):
+    server = ThreadingHTTPServer((host, port), ObjectStoreHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000
+    server.objects = {}
+    server.lock = threading.Lock()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline S3-compatible object store stand-in.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency-ms', type=float, default=20, help='fixed latency per request')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency_ms)
+    print(f"Object store stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import json
+import string
+
+import schemas
+
+CHARS_PER_TOKEN = 4
+
+_formatter = string.Formatter()
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    head = int(max_chars * 0.75)
+    tail = max_chars - head
+    omitted = len(text) - head - tail
+    return f"{text[:head].rstrip()}\n[... {omitted} characters omitted ...]\n{text[-tail:].lstrip()}"
+
+
+def compact_json(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+class PromptTemplate:
+    def __init__(self, name, version, system, text, response_schema, budgets=None):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.text = text
+        self.response_schema = response_schema
+        self.budgets = budgets or {}
+        self.fields = frozenset(field for _, field, _, _ in _formatter.parse(text) if field)
+        self.system_tokens = estimate_tokens(system)
+        self.static_tokens = self.system_tokens + estimate_tokens(text.format(**dict.fromkeys(self.fields, '')))
+        self.max_tokens = self.static_tokens + sum(self.budgets.values())
+
+    def render(self, **values):
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt '{self.name}' is missing fields: {', '.join(sorted(missing))}")
+        for field, budget in self.budgets.items():
+            values[field] = truncate_to_tokens(str(values[field]), budget)
+        return self.text.format(**values)
+
+
+PROMPTS = {}
+
+
+def register(name, version, system, text, response_schema, budgets=None):
+    PROMPTS[name] = PromptTemplate(name, version, system, text, response_schema, budgets)
+    return PROMPTS[name]
+
+
+def render(name, **values):
+    return PROMPTS[name].render(**values)
+
+
+# Static instructions live in `system` so they can be sent as a system
+# instruction (or a cached context); `text` carries only the per-call fields.
+# The output structure is enforced through `response_schema`.
+
+register('post', 2, """You are an expert LinkedIn content strategist. Generate a high-performing LinkedIn post.
+
+Create a LinkedIn post with the following structure:
+
+1. HOOK (First 2-3 lines that grab attention - this appears before "...see more")
+2. BODY (Main content with insights, story, or value)
+3. CTA (Call-to-action to encourage engagement)
+
+Make the content:
+- Authentic and personal
+- Value-driven with actionable insights
+- Formatted with line breaks for readability
+- Include relevant emojis sparingly
+- Optimized for LinkedIn's algorithm""", """Topic: {topic}
+Niche/Industry: {niche}
+Tone: {tone}
+Target Length: {target_length}
+{carousel_instruction}""", schemas.PostResult, {'topic': 200, 'niche': 50, 'tone': 20})
+
+
+register('rewrite', 2, """You are a LinkedIn content optimization expert. Rewrite the user's content to be more engaging and professional for LinkedIn.
+
+Rewrite the content with:
+1. A strong hook that grabs attention
+2. Clear structure with line breaks
+3. Professional yet authentic voice
+4. Improved clarity and impact
+5. LinkedIn-optimized formatting
+6. Appropriate use of emojis (sparingly)""", """Original Content:
+{original_content}
+
+Target Tone: {target_tone}""", schemas.RewriteResult, {'original_content': 3000, 'target_tone': 20})
+
+
+register('carousel', 2, """You are a LinkedIn carousel content expert. Create a compelling 5-slide carousel outline.
+
+Create a carousel with this structure:
+- Slide 1: Hook (Attention-grabbing title/question)
+- Slide 2: Problem (Pain point your audience faces)
+- Slide 3: Insight (Key realization or data point)
+- Slide 4: Solution (Your answer or framework)
+- Slide 5: CTA (Call-to-action)
+
+Make each slide:
+- Concise and scannable
+- Visually describable
+- Value-packed""", """Topic: {topic}
+Niche/Industry: {niche}""", schemas.CarouselResult, {'topic': 200, 'niche': 50})
+
+
+register('profile', 2, """You are a LinkedIn profile optimization expert. Analyze and improve the user's LinkedIn profile sections.
+
+Provide optimized versions with:
+1. Keyword optimization for LinkedIn search
+2. Clear value proposition
+3. Engaging storytelling
+4. Professional tone
+5. Strong calls-to-action
+
+For experience, use the STAR method (Situation, Task, Action, Result).""", """Current About Section:
+{about}
+
+Current Headline:
+{headline}
+
+Current Experience:
+{experience}
+
+Current Skills:
+{skills}""", schemas.ProfileResult, {'about': 1000, 'headline': 100, 'experience': 2000, 'skills': 300})
+
+
+register('message', 2, """You are a LinkedIn networking expert. Generate a personalized outreach message.
+
+Create a message that:
+1. Has a personalized opening (not generic)
+2. Shows genuine interest or value
+3. Is concise (under 300 characters for connection requests, under 500 for InMail)
+4. Has a clear but soft call-to-action
+5. Avoids being salesy or pushy""", """Message Type: {message_type}
+Tone: {tone}
+Context/Goal: {context}
+Recipient Information: {recipient_info}""", schemas.MessageResult, {'message_type': 50, 'tone': 20, 'context': 500, 'recipient_info': 500})
+
+
+register('calendar', 3, """You are a LinkedIn content strategist. Fill in a content calendar whose posting days, times and formats have already been scheduled from the user's own analytics.
+
+For every numbered slot give a specific, actionable topic that suits the slot's format, an opening hook and up to 3 hashtags. Also give one theme per week, content pillars to rotate, measurable goals and strategy tips.""", """Niche/Industry: {niche}
+Goals: {goals}
+
+Schedule ({post_count} slots as slot, week, day, format):
+{schedule}""", schemas.CalendarPlan, {'niche': 50, 'goals': 300})
+
+
+register('analytics', 3, """You are a LinkedIn analytics expert. Analyze the user's LinkedIn performance data and provide comprehensive strategic recommendations.
+
+Base hook suggestions on the top performing posts. Use the trend and cadence features to judge momentum and consistency, and the outliers to explain what separates the best and worst posts. Features marked n/a could not be computed from the export.""", """Analytics Summary:
+- Total Posts: {total_posts}
+- Date Range: {date_range}
+- Average Impressions: {avg_impressions}
+- Average Reactions: {avg_reactions}
+- Average Comments: {avg_comments}
+- Average Shares: {avg_shares}
+- Engagement Rate: {engagement_rate}%
+- Best Performing Day: {best_day}
+- Best Content Type: {best_content_type}
+
+Trend and Cadence Features:
+{features}
+
+Outlier Posts:
+{outliers}
+
+Top Performing Posts:
+{top_posts}""", schemas.AnalyticsResult, {'top_posts': 600, 'outliers': 250})
+
+
+register('comparison', 1, """You are a LinkedIn analytics expert. Compare the user's performance across the periods below. P1 is the baseline and every change is relative to it.
+
+Explain what changed, the likely causes, what to keep doing and what to change next. Refer to the numbers and keep each point specific.""", """Periods:
+{periods}
+
+Weekday lift changes vs {baseline} (a day's average impressions relative to the period average):
+{weekday_shifts}
+
+Format mix changes vs {baseline} (share of posts):
+{type_shifts}""", schemas.ComparisonResult, {'baseline': 20, 'periods': 500, 'weekday_shifts': 150, 'type_shifts': 150})
@@ -0,0 +1,74 @@
+import re
+import json
+import zlib
+import difflib
+
+# Draft revision encoding. Every SNAPSHOT_INTERVAL-th revision stores the full
+# text; the others store a word-level delta against the previous revision, so
+# rebuilding any revision applies at most SNAPSHOT_INTERVAL - 1 deltas.
+
+SNAPSHOT_INTERVAL = 10
+COMPRESS_LEVEL = 9
+
+_TOKEN = re.compile(r'\s+|[^\s]+')
+
+
+def _tokens(text):
+    return _TOKEN.findall(text)
+
+
+def make_delta(old, new):
+    # Edits as [start, end, replacement] in old-text character offsets.
+    old_tokens = _tokens(old)
+    new_tokens = _tokens(new)
+    offsets = [0]
+    for token in old_tokens:
+        offsets.append(offsets[-1] + len(token))
+
+    edits = []
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            edits.append([offsets[i1], offsets[i2], ''.join(new_tokens[j1:j2])])
+    return edits
+
+
+def apply_delta(old, edits):
+    parts = []
+    position = 0
+    for start, end, replacement in edits:
+        parts.append(old[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(old[position:])
+    return ''.join(parts)
+
+
+def encode(payload):
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), COMPRESS_LEVEL)
+
+
+def decode(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+def is_snapshot_number(number):
+    return number == 1 or number % SNAPSHOT_INTERVAL == 1
+
+
+def build(number, previous_text, text):
+    if is_snapshot_number(number):
+        return True, encode(text)
+    return False, encode(make_delta(previous_text, text))
+
+
+def reconstruct(rows):
+    # rows: (is_snapshot, data) from the nearest snapshot up to the wanted revision.
+    text = None
+    for is_snapshot, data in rows:
+        text = decode(data) if is_snapshot else apply_delta(text, decode(data))
+    return text
+
+
+def unified_diff(old, new, old_label, new_label):
+    return '\n'.join(difflib.unified_diff(old.splitlines(), new.splitlines(), old_label, new_label, lineterm=''))
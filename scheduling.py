@@ -0,0 +1,164 @@
+import pandas as pd
+
+# Posting days, times and formats for content calendars, derived from the
+# user's uploaded analytics so the model only has to fill in topics and hooks.
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+POSTS_PER_WEEK = 5
+MIN_POSTS = 5
+# Pseudo-posts pulling sparsely sampled days, hours and formats toward the prior.
+SHRINKAGE = 3
+
+# LinkedIn-wide norms, used as the prior and whenever there is no dated history.
+DEFAULT_DAY_LIFT = {
+    'Monday': 0.95, 'Tuesday': 1.1, 'Wednesday': 1.1, 'Thursday': 1.05,
+    'Friday': 0.9, 'Saturday': 0.6, 'Sunday': 0.65
+}
+DEFAULT_HOURS = {
+    'Monday': 9, 'Tuesday': 10, 'Wednesday': 9, 'Thursday': 10,
+    'Friday': 9, 'Saturday': 11, 'Sunday': 11
+}
+DEFAULT_TYPES = ['Text', 'Carousel', 'Poll', 'Video']
+
+TYPE_TIPS = {
+    'Text': 'Reply to every comment in the first hour to extend reach.',
+    'Carousel': 'Tease the final slide in the caption so readers swipe through.',
+    'Poll': 'Comment with your own answer to start the discussion.',
+    'Video': 'Add captions; most people watch with the sound off.',
+    'Image': 'Use the first line of the caption to explain why the image matters.',
+    'Article': 'Share a one-line takeaway with the link to earn the click.',
+    'Document': 'Put the key insight on the cover page.'
+}
+DEFAULT_TIP = 'Ask a specific question at the end to invite comments.'
+
+
+def _shrunk(grouped, prior):
+    return (grouped['sum'] + SHRINKAGE * prior) / (grouped['count'] + SHRINKAGE)
+
+
+def build_profile(df, date_col, score_col, type_col=None):
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    scores = pd.to_numeric(df[score_col], errors='coerce')
+    valid = dates.notna() & scores.notna()
+    if valid.sum() < MIN_POSTS:
+        return None
+
+    frame = pd.DataFrame({
+        'weekday': dates[valid].dt.dayofweek,
+        'hour': dates[valid].dt.hour,
+        'score': scores[valid].astype(float)
+    })
+    overall = frame['score'].mean()
+    if overall <= 0:
+        return None
+
+    prior = pd.Series([DEFAULT_DAY_LIFT[day] * overall for day in WEEKDAYS])
+    by_day = frame.groupby('weekday')['score'].agg(['sum', 'count']).reindex(range(7), fill_value=0)
+    day_lift = _shrunk(by_day, prior) / overall
+
+    profile = {
+        'posts': int(len(frame)),
+        'metric': score_col,
+        'day_lift': {WEEKDAYS[day]: round(float(lift), 3) for day, lift in day_lift.items()},
+        'hours': {},
+        'types': []
+    }
+
+    # Date-only exports parse to midnight, which says nothing about posting time.
+    if (frame['hour'] != 0).any():
+        by_hour = frame.groupby('hour')['score'].agg(['sum', 'count'])
+        best_hour = int(_shrunk(by_hour, overall).idxmax())
+        by_slot = frame.groupby(['weekday', 'hour'])['score'].agg(['sum', 'count'])
+        best_slots = _shrunk(by_slot, overall).groupby(level='weekday').idxmax()
+        profile['hours'] = {WEEKDAYS[day]: best_hour for day in range(7)}
+        profile['hours'].update({WEEKDAYS[day]: int(slot[1]) for day, slot in best_slots.items()})
+
+    if type_col:
+        frame['type'] = df.loc[valid, type_col].astype(str).str.strip().str.title()
+        by_type = frame.groupby('type')['score'].agg(['sum', 'count'])
+        profile['types'] = _shrunk(by_type, overall).sort_values(ascending=False).index[:4].tolist()
+
+    return profile
+
+
+def format_time(hour):
+    return f"{hour % 12 or 12}:00 {'AM' if hour < 12 else 'PM'} IST"
+
+
+def _type_rotation(types):
+    # The best-performing format takes every other slot; the rest share the remainder.
+    if len(types) < 2:
+        return list(types)
+    rotation = []
+    for other in types[1:]:
+        rotation.extend([types[0], other])
+    return rotation
+
+
+def build_skeleton(profile, weeks):
+    day_lift = dict(DEFAULT_DAY_LIFT)
+    hours = dict(DEFAULT_HOURS)
+    types = DEFAULT_TYPES
+    if profile:
+        day_lift.update(profile.get('day_lift', {}))
+        hours.update(profile.get('hours', {}))
+        types = profile.get('types') or DEFAULT_TYPES
+
+    days = sorted(WEEKDAYS, key=lambda day: -day_lift[day])[:POSTS_PER_WEEK]
+    days.sort(key=WEEKDAYS.index)
+    rotation = _type_rotation(types)
+
+    skeleton = []
+    slot = 0
+    for _ in range(weeks):
+        week = []
+        for day in days:
+            week.append({'day': day, 'best_time': format_time(hours[day]), 'post_type': rotation[slot % len(rotation)]})
+            slot += 1
+        skeleton.append(week)
+    return skeleton
+
+
+def describe(skeleton):
+    lines = []
+    slot = 0
+    for week_number, week in enumerate(skeleton, 1):
+        for day in week:
+            slot += 1
+            lines.append(f"{slot} W{week_number} {day['day'][:3]} {day['post_type']}")
+    return '\n'.join(lines)
+
+
+def fill_skeleton(skeleton, plan):
+    posts = {post['slot']: post for post in plan.get('posts', [])}
+    pillars = plan.get('content_pillars') or ['Open topic']
+    themes = plan.get('week_themes', [])
+
+    weeks = []
+    slot = 0
+    for week_number, week in enumerate(skeleton, 1):
+        days = []
+        for day in week:
+            slot += 1
+            post = posts.get(slot, {})
+            days.append(dict(
+                day,
+                topic=post.get('topic') or pillars[(slot - 1) % len(pillars)],
+                hook_idea=post.get('hook_idea', ''),
+                hashtags=post.get('hashtags', [])[:3],
+                engagement_tip=TYPE_TIPS.get(day['post_type'], DEFAULT_TIP)
+            ))
+        weeks.append({
+            'week_number': week_number,
+            'theme': themes[week_number - 1] if week_number <= len(themes) else '',
+            'days': days
+        })
+
+    return {
+        'calendar_title': plan.get('calendar_title', ''),
+        'strategy_overview': plan.get('strategy_overview', ''),
+        'weeks': weeks,
+        'content_pillars': plan.get('content_pillars', []),
+        'monthly_goals': plan.get('monthly_goals', []),
+        'pro_tips': plan.get('pro_tips', [])
+    }
@@ -0,0 +1,172 @@
+import typing
+
+import pydantic_core
+from pydantic import BaseModel, Field, ValidationError
+
+import metrics
+
+
+class PostResult(BaseModel):
+    primary_fields: typing.ClassVar[tuple] = ('full_post',)
+
+    hook: str = Field(description='The attention-grabbing opening lines')
+    body: str = Field(description='The main content of the post')
+    cta: str = Field(description='The call-to-action')
+    full_post: str = Field(description='The complete post ready to copy')
+    carousel: list[str] = Field(default=[], description='5 slide outlines, only if a carousel is requested')
+
+
+class RewriteResult(BaseModel):
+    primary_fields: typing.ClassVar[tuple] = ('rewritten_content',)
+
+    rewritten_content: str = Field(description='The fully rewritten content')
+    improvements_made: list[str] = Field(description='List of improvements made')
+    engagement_tips: list[str] = Field(description='Tips for better engagement')
+
+
+class CarouselSlide(BaseModel):
+    slide_number: int
+    type: str = Field(description='Hook, Problem, Insight, Solution or CTA')
+    headline: str
+    content: str
+    design_tip: str
+
+
+class CarouselResult(BaseModel):
+    primary_fields: typing.ClassVar[tuple] = ('slides',)
+
+    title: str = Field(description='Carousel title')
+    slides: list[CarouselSlide] = Field(description='Exactly 5 slides')
+    caption: str = Field(description='Suggested LinkedIn caption for the carousel post')
+
+
+class ProfileResult(BaseModel):
+    primary_fields: typing.ClassVar[tuple] = ('optimized_about',)
+
+    optimized_about: str = Field(description='Improved About section (max 2600 characters)')
+    headline_variations: list[str] = Field(description='5 different headline options')
+    optimized_experience: str = Field(description='Improved experience using STAR method')
+    skills_suggestions: list[str] = Field(description='10 relevant skills to add')
+    profile_tips: list[str] = Field(description='5 additional profile optimization tips')
+    keyword_suggestions: list[str] = Field(description='Relevant keywords to include')
+
+
+class MessageResult(BaseModel):
+    primary_fields: typing.ClassVar[tuple] = ('message',)
+
+    subject_line: str = Field(default='', description='For InMail (optional)')
+    message: str = Field(description='The full message')
+    connection_note: str = Field(description='Shorter version for connection request (under 300 chars)')
+    follow_up_message: str = Field(description='Suggested follow-up if no response')
+    personalization_tips: list[str] = Field(description='Tips to further personalize')
+    what_not_to_do: list[str] = Field(description='Common mistakes to avoid')
+
+
+class CalendarPost(BaseModel):
+    slot: int = Field(description='Slot number from the schedule')
+    topic: str = Field(description='Specific topic suited to the slot\'s post format')
+    hook_idea: str = Field(description='Opening hook suggestion')
+    hashtags: list[str] = Field(description='Up to 3 relevant hashtags')
+
+
+class CalendarPlan(BaseModel):
+    primary_fields: typing.ClassVar[tuple] = ('posts',)
+
+    calendar_title: str = Field(description='Title for this content plan')
+    strategy_overview: str = Field(description='Brief strategy explanation')
+    week_themes: list[str] = Field(description='One theme per week')
+    posts: list[CalendarPost] = Field(description='One entry per schedule slot')
+    content_pillars: list[str] = Field(description='Main content themes to rotate')
+    monthly_goals: list[str] = Field(description='Specific measurable goals')
+    pro_tips: list[str] = Field(description='Additional strategy tips')
+
+
+class PostIdea(BaseModel):
+    day: int
+    topic: str
+    type: str
+    hook: str
+
+
+class AnalyticsResult(BaseModel):
+    primary_fields: typing.ClassVar[tuple] = ('performance_summary',)
+
+    performance_summary: str = Field(description='Overall performance assessment')
+    strengths: list[str] = Field(description="What's working well")
+    areas_for_improvement: list[str] = Field(description='What needs work')
+    reach_recommendations: list[str] = Field(description='How to increase reach')
+    timing_recommendations: list[str] = Field(description='Best times and days to post')
+    content_recommendations: list[str] = Field(description='Content type and topic suggestions')
+    hook_suggestions: list[str] = Field(description='5 hook templates based on top performers')
+    what_to_avoid: list[str] = Field(description='Things to stop doing')
+    next_7_post_ideas: list[PostIdea] = Field(description='Exactly 7 post ideas')
+    engagement_tactics: list[str] = Field(description='Ways to boost engagement')
+    growth_forecast: str = Field(description='Expected improvement if recommendations followed')
+
+
+
+class ComparisonResult(BaseModel):
+    primary_fields: typing.ClassVar[tuple] = ('comparison_summary',)
+
+    comparison_summary: str = Field(description='What changed between the periods and why it matters')
+    key_changes: list[str] = Field(description='The most important shifts, most important first')
+    likely_causes: list[str] = Field(description='Probable reasons for the shifts')
+    keep_doing: list[str] = Field(description='Habits from the stronger period worth keeping')
+    change_next: list[str] = Field(description='Concrete adjustments for the next period')
+
+def _empty_value(annotation):
+    origin = typing.get_origin(annotation)
+    if origin is list:
+        return []
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _fill_missing(annotation, {})
+    if annotation is int:
+        return 0
+    return ''
+
+
+def _fill_missing(schema, data):
+    if not isinstance(data, dict):
+        data = {}
+    for name, field in schema.model_fields.items():
+        annotation = field.annotation
+        value = data.get(name)
+        if value is None:
+            data[name] = field.get_default() if not field.is_required() else _empty_value(annotation)
+        elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            data[name] = _fill_missing(annotation, value)
+        elif typing.get_origin(annotation) is list and isinstance(value, list):
+            item_type = typing.get_args(annotation)[0]
+            if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+                data[name] = [_fill_missing(item_type, item) for item in value if isinstance(item, dict)]
+    return data
+
+
+def decode_response(schema, text, generator=None):
+    if not text:
+        metrics.inc('response_decode_total', generator=generator, outcome='empty')
+        raise ValueError('The model returned an empty response. Please try again.')
+
+    try:
+        result = schema.model_validate_json(text)
+        metrics.inc('response_decode_total', generator=generator, outcome='ok')
+        return result.model_dump()
+    except ValidationError:
+        pass
+
+    # Usually a response cut off at the token limit: keep whatever parsed,
+    # close the open structures and default the fields that never arrived.
+    # A repair only counts if the content the user asked for survived.
+    try:
+        data = pydantic_core.from_json(text, allow_partial='trailing-strings')
+        if not isinstance(data, dict):
+            raise ValueError('not an object')
+        result = schema.model_validate(_fill_missing(schema, data))
+        if not all(getattr(result, name) for name in getattr(schema, 'primary_fields', ())):
+            raise ValueError('primary content missing')
+    except (ValueError, ValidationError):
+        metrics.inc('response_decode_total', generator=generator, outcome='failed')
+        raise ValueError('The model returned malformed content. Please try again.')
+
+    metrics.inc('response_decode_total', generator=generator, outcome='repaired')
+    return result.model_dump()
@@ -0,0 +1,88 @@
+import re
+
+# Fast local heuristics for ranking generated variants. Each feature scores 0-1
+# against a target band and falls off linearly outside it; the weighted sum is
+# reported on a 0-100 scale.
+
+_EMOJI = re.compile('[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF]')
+_HASHTAG = re.compile(r'(?<![\w#])#\w+')
+_WORD = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+_SENTENCE_END = re.compile(r'[.!?]+(?:\s|$)|\n+')
+_VOWEL_GROUPS = re.compile(r'[aeiouy]+')
+_SALUTATION = re.compile(r'^(?:hi|hello|hey|dear|greetings)\b[^.!?]{0,40}[,!]?$', re.I)
+
+# (low, high, falloff) for each feature, and the feature weights.
+POST_TARGETS = {
+    'hook_chars': (60, 150, 120),
+    'reading_ease': (60, 90, 40),
+    'emoji_per_100_words': (0.5, 3, 4),
+    'hashtags': (3, 5, 4),
+}
+POST_WEIGHTS = {'hook_chars': 0.3, 'reading_ease': 0.3, 'emoji_per_100_words': 0.2, 'hashtags': 0.2}
+
+MESSAGE_TARGETS = {
+    'hook_chars': (30, 120, 100),
+    'reading_ease': (55, 85, 40),
+    'emoji_per_100_words': (0, 0.5, 3),
+    'hashtags': (0, 0, 3),
+}
+MESSAGE_WEIGHTS = {'hook_chars': 0.25, 'reading_ease': 0.45, 'emoji_per_100_words': 0.15, 'hashtags': 0.15}
+
+
+def _syllables(word):
+    word = word.lower()
+    count = len(_VOWEL_GROUPS.findall(word))
+    if word.endswith('e') and not word.endswith(('le', 'ee')) and count > 1:
+        count -= 1
+    return max(count, 1)
+
+
+def reading_ease(text):
+    words = _WORD.findall(text)
+    if not words:
+        return 0.0
+    sentences = max(len([s for s in _SENTENCE_END.split(text) if _WORD.search(s)]), 1)
+    syllables = sum(_syllables(word) for word in words)
+    return 206.835 - 1.015 * (len(words) / sentences) - 84.6 * (syllables / len(words))
+
+
+def first_line(text):
+    # Skips a salutation ("Hi Sarah,") so messages are judged on their real opening.
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    if len(lines) > 1 and _SALUTATION.match(lines[0]):
+        return lines[1]
+    return lines[0] if lines else ''
+
+
+def features(text, hook=None):
+    words = len(_WORD.findall(text))
+    hook = hook.strip() if hook else first_line(text)
+    return {
+        'hook_chars': len(hook),
+        'reading_ease': round(reading_ease(text), 1),
+        'emoji_per_100_words': round(len(_EMOJI.findall(text)) * 100 / words, 2) if words else 0.0,
+        'hashtags': len(_HASHTAG.findall(text)),
+    }
+
+
+def _band(value, low, high, falloff):
+    if low <= value <= high:
+        return 1.0
+    distance = low - value if value < low else value - high
+    return max(0.0, 1.0 - distance / falloff)
+
+
+def score(text, hook=None, targets=POST_TARGETS, weights=POST_WEIGHTS):
+    values = features(text, hook)
+    breakdown = {name: round(_band(values[name], *targets[name]) * 100) for name in targets}
+    total = round(sum(breakdown[name] * weights[name] for name in weights))
+    return total, breakdown, values
+
+
+def rank(variants, text_key, hook_key=None, targets=POST_TARGETS, weights=POST_WEIGHTS):
+    ranked = []
+    for variant in variants:
+        total, breakdown, values = score(variant.get(text_key, ''), variant.get(hook_key) if hook_key else None, targets, weights)
+        ranked.append(dict(variant, score=total, score_breakdown=breakdown, score_features=values))
+    ranked.sort(key=lambda variant: variant['score'], reverse=True)
+    return ranked
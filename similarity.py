@@ -0,0 +1,211 @@
+import os
+import re
+import zlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+
+# MinHash signatures with LSH banding, kept per user in contiguous NumPy arrays.
+# 16 bands of 4 rows surface candidates from roughly 0.5 Jaccard similarity up;
+# candidates are then scored against the full signature.
+#
+# A user's index is built from the database once and then updated in place on
+# every write. Each lookup passes the user's current (draft count, last update)
+# version; if another process changed the drafts, only the drafts updated since
+# the index's watermark are reloaded.
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+CONTENT_SHINGLE = 5
+TOPIC_SHINGLE = 3
+SIGNATURE_BYTES = NUM_PERM * 4
+
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', '0.8'))
+TOPIC_THRESHOLD = float(os.environ.get('TOPIC_DUPLICATE_THRESHOLD', '0.7'))
+MAX_CACHED_USERS = 256
+
+_MERSENNE = (1 << 31) - 1
+_rng = np.random.RandomState(20240101)
+_A = _rng.randint(1, _MERSENNE, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _MERSENNE, NUM_PERM).astype(np.uint64)
+
+_lock = threading.Lock()
+_indexes = OrderedDict()
+
+
+def _normalize(text):
+    return re.sub(r'[\W_]+', ' ', text.lower()).strip()
+
+
+def signature(text, shingle_size=CONTENT_SHINGLE):
+    text = _normalize(text or '')
+    if not text:
+        return None
+    grams = {text[i:i + shingle_size] for i in range(max(len(text) - shingle_size + 1, 1))}
+    hashes = np.fromiter(
+        (zlib.crc32(gram.encode('utf-8')) & _MERSENNE for gram in grams),
+        dtype=np.uint64,
+        count=len(grams)
+    )
+    return ((hashes[:, None] * _A + _B) % _MERSENNE).min(axis=0).astype(np.uint32)
+
+
+def to_bytes(sig):
+    return sig.tobytes() if sig is not None else None
+
+
+def from_bytes(data):
+    return np.frombuffer(data, dtype=np.uint32) if data else None
+
+
+def _band_keys(sig):
+    return [(band, sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()) for band in range(BANDS)]
+
+
+class SignatureIndex:
+    def __init__(self, capacity=64):
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.signatures = np.zeros((capacity, NUM_PERM), dtype=np.uint32)
+        self.size = 0
+        self.rows = {}
+        self.buckets = {}
+        self.free = []
+
+    def add(self, draft_id, sig):
+        self.remove(draft_id)
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.size == len(self.ids):
+                self.ids = np.concatenate([self.ids, np.full(len(self.ids), -1, dtype=np.int64)])
+                self.signatures = np.concatenate([self.signatures, np.zeros_like(self.signatures)])
+            row = self.size
+            self.size += 1
+        self.ids[row] = draft_id
+        self.signatures[row] = sig
+        self.rows[draft_id] = row
+        for key in _band_keys(sig):
+            self.buckets.setdefault(key, set()).add(row)
+
+    def remove(self, draft_id):
+        row = self.rows.pop(draft_id, None)
+        if row is None:
+            return
+        for key in _band_keys(self.signatures[row]):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(row)
+                if not bucket:
+                    del self.buckets[key]
+        self.ids[row] = -1
+        self.free.append(row)
+
+    def query(self, sig, threshold, exclude_id=None):
+        candidates = set()
+        for key in _band_keys(sig):
+            candidates.update(self.buckets.get(key, ()))
+        if not candidates:
+            return None
+
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        rows = rows[self.ids[rows] != (exclude_id if exclude_id is not None else -1)]
+        if len(rows) == 0:
+            return None
+        scores = (self.signatures[rows] == sig).mean(axis=1)
+        best = int(scores.argmax())
+        if scores[best] < threshold:
+            return None
+        return int(self.ids[rows[best]]), round(float(scores[best]), 3)
+
+
+class UserIndex:
+    def __init__(self, version, records):
+        self.content = SignatureIndex()
+        self.topics = SignatureIndex()
+        self.drafts = set()
+        self.version = version
+        self.watermark = None
+        self.apply(records)
+
+    def apply(self, records):
+        # records: (draft_id, updated_at, content_signature, topic_signature); a draft
+        # without a signature yet still counts towards the version.
+        for draft_id, updated_at, content_sig, topic_sig in records:
+            self.remove(draft_id)
+            self.add(draft_id, from_bytes(content_sig), from_bytes(topic_sig))
+            if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+
+    def add(self, draft_id, content_sig, topic_sig=None):
+        self.drafts.add(draft_id)
+        if content_sig is not None:
+            self.content.add(draft_id, content_sig)
+        if topic_sig is not None:
+            self.topics.add(draft_id, topic_sig)
+
+    def remove(self, draft_id):
+        self.drafts.discard(draft_id)
+        self.content.remove(draft_id)
+        self.topics.remove(draft_id)
+
+
+def get_index(user_id, version, loader):
+    # loader(since) returns the user's drafts updated at or after `since`, or all of them for None.
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None:
+            _indexes.move_to_end(user_id)
+            if index.version == version:
+                metrics.record_cache('similarity_index', True)
+                return index
+            since = index.watermark
+
+    if index is not None:
+        changes = loader(since)
+        with _lock:
+            index.apply(changes)
+            # Drafts deleted elsewhere don't show up as changes; a count mismatch means a full reload.
+            if len(index.drafts) == version[0]:
+                index.version = version
+                metrics.record_cache('similarity_index', True)
+                return index
+
+    metrics.record_cache('similarity_index', False)
+    index = UserIndex(version, loader(None))
+    with _lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > MAX_CACHED_USERS:
+            _indexes.popitem(last=False)
+    return index
+
+
+def index_draft(user_id, draft_id, content_sig, topic_sig=None):
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None:
+            index.add(draft_id, content_sig, topic_sig)
+
+
+def remove_drafts(user_id, draft_ids):
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None:
+            for draft_id in draft_ids:
+                index.remove(draft_id)
+
+
+def find_duplicate(user_id, version, loader, content_sig, exclude_id=None):
+    index = get_index(user_id, version, loader)
+    with _lock:
+        return index.content.query(content_sig, DUPLICATE_THRESHOLD, exclude_id)
+
+
+def find_topic_match(user_id, version, loader, topic_sig):
+    index = get_index(user_id, version, loader)
+    with _lock:
+        return index.topics.query(topic_sig, TOPIC_THRESHOLD)
@@ -0,0 +1,291 @@
+import os
+import re
+import hmac
+import time
+import hashlib
+import logging
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import metrics
+
+# Content-addressed storage for generated artifacts such as analytics charts.
+#
+#   ARTIFACT_STORAGE=local   files under ARTIFACT_DIR (default ./artifacts)
+#   ARTIFACT_STORAGE=memory  kept in RAM for ARTIFACT_TTL seconds; single instance only
+#   ARTIFACT_STORAGE=object  S3-compatible bucket (MinIO, S3, objectstore_standin.py)
+#
+# Writes happen on a background pool. Until a write lands, the bytes are served
+# from the pending map, so the page that references an artifact never waits.
+
+STORAGE = os.environ.get('ARTIFACT_STORAGE', 'local')
+ARTIFACT_DIR = os.environ.get('ARTIFACT_DIR', 'artifacts')
+ARTIFACT_TTL = int(os.environ.get('ARTIFACT_TTL', '3600'))
+MEMORY_MAX_BYTES = int(os.environ.get('ARTIFACT_MEMORY_MAX_BYTES', str(256 * 1024 * 1024)))
+WRITE_WORKERS = int(os.environ.get('ARTIFACT_WRITE_WORKERS', '2'))
+
+KEY_PATTERN = re.compile(r'^(charts|uploads)/[0-9a-f]{32}\.(png|csv|xlsx|xls)$')
+
+
+class InvalidKeyError(ValueError):
+    pass
+
+
+def valid_key(key):
+    return bool(KEY_PATTERN.match(key))
+
+
+# The content type always follows from the validated extension, never from the uploader.
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'xls': 'application/vnd.ms-excel'
+}
+
+
+def _content_type(key):
+    return CONTENT_TYPES[key.rsplit('.', 1)[-1]]
+
+
+class LocalStorage:
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        if not valid_key(key):
+            raise InvalidKeyError(key)
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, *key.split('/')))
+        if os.path.commonpath([root, path]) != root:
+            raise InvalidKeyError(key)
+        return path
+
+    def put(self, key, data, content_type):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read(), _content_type(key)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class MemoryStorage:
+    name = 'memory'
+
+    def __init__(self, ttl, max_bytes):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _drop(self, key):
+        data, _, _ = self._items.pop(key)
+        self.size -= len(data)
+
+    def put(self, key, data, content_type):
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = (data, content_type, time.monotonic() + self.ttl)
+            self.size += len(data)
+            while self.size > self.max_bytes and len(self._items) > 1:
+                self._drop(next(iter(self._items)))
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[2] < time.monotonic():
+                self._drop(key)
+                return None
+            return item[0], item[1]
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+
+
+class ObjectStorage:
+    # Path-style requests signed with AWS Signature V4, so any S3-compatible
+    # endpoint works without an SDK dependency.
+    name = 'object'
+
+    def __init__(self, endpoint, bucket, access_key, secret_key, region='us-east-1'):
+        self.endpoint = endpoint.rstrip('/')
+        self.host = urllib.parse.urlsplit(self.endpoint).netloc
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+
+    def _signed_request(self, method, key, data=None, content_type=None):
+        path = '/' + urllib.parse.quote(f"{self.bucket}/{key}", safe='/-_.~')
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        datestamp = now.strftime('%Y%m%d')
+        payload_hash = hashlib.sha256(data or b'').hexdigest()
+
+        headers = {'host': self.host, 'x-amz-content-sha256': payload_hash, 'x-amz-date': amz_date}
+        if content_type:
+            headers['content-type'] = content_type
+        signed_headers = ';'.join(sorted(headers))
+        canonical_request = '\n'.join([
+            method, path, '',
+            ''.join(f"{name}:{headers[name]}\n" for name in sorted(headers)),
+            signed_headers, payload_hash
+        ])
+        scope = f"{datestamp}/{self.region}/s3/aws4_request"
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256', amz_date, scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+        ])
+        signing_key = f"AWS4{self.secret_key}".encode('utf-8')
+        for part in (datestamp, self.region, 's3', 'aws4_request'):
+            signing_key = hmac.new(signing_key, part.encode('utf-8'), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        headers['authorization'] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del headers['host']
+
+        request = urllib.request.Request(self.endpoint + path, data=data, method=method, headers=headers)
+        return urllib.request.urlopen(request, timeout=30)
+
+    def put(self, key, data, content_type):
+        with self._signed_request('PUT', key, data, content_type):
+            pass
+
+    def get(self, key):
+        try:
+            with self._signed_request('GET', key) as response:
+                return response.read(), _content_type(key)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def delete(self, key):
+        try:
+            with self._signed_request('DELETE', key):
+                pass
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                raise
+
+
+def create_backend():
+    if STORAGE == 'memory':
+        return MemoryStorage(ARTIFACT_TTL, MEMORY_MAX_BYTES)
+    if STORAGE == 'object':
+        return ObjectStorage(
+            os.environ.get('OBJECT_STORE_ENDPOINT', 'http://127.0.0.1:9000'),
+            os.environ.get('OBJECT_STORE_BUCKET', 'creator-tales'),
+            os.environ.get('OBJECT_STORE_ACCESS_KEY', ''),
+            os.environ.get('OBJECT_STORE_SECRET_KEY', ''),
+            os.environ.get('OBJECT_STORE_REGION', 'us-east-1')
+        )
+    return LocalStorage(ARTIFACT_DIR)
+
+
+_backend = None
+_executor = ThreadPoolExecutor(max_workers=WRITE_WORKERS, thread_name_prefix='artifact-writer')
+_pending = {}
+_futures = set()
+_writes = {}
+_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def _write(key, data, content_type):
+    backend = get_backend()
+    started = time.perf_counter()
+    try:
+        backend.put(key, data, content_type)
+    except Exception as e:
+        logging.error(f"Error writing artifact {key}: {e}")
+    finally:
+        metrics.observe('artifact_write_duration_seconds', time.perf_counter() - started, backend=backend.name)
+        with _lock:
+            _pending.pop(key, None)
+
+
+def _write_done(key, future):
+    _futures.discard(future)
+    with _lock:
+        if _writes.get(key) is future:
+            del _writes[key]
+
+
+def save(namespace, data, extension):
+    key = f"{namespace}/{hashlib.sha256(data).hexdigest()[:32]}.{extension}"
+    if not valid_key(key):
+        raise InvalidKeyError(key)
+    content_type = _content_type(key)
+    with _lock:
+        if key in _pending:
+            return key
+        _pending[key] = (data, content_type)
+        future = _executor.submit(_write, key, data, content_type)
+        _writes[key] = future
+    _futures.add(future)
+    future.add_done_callback(lambda done: _write_done(key, done))
+    return key
+
+
+def load(key):
+    if not valid_key(key):
+        return None
+    with _lock:
+        pending = _pending.get(key)
+    if pending is not None:
+        return pending
+    return get_backend().get(key)
+
+
+def delete(key):
+    if not valid_key(key):
+        raise InvalidKeyError(key)
+    with _lock:
+        future = _writes.get(key)
+    # A write still in flight would otherwise land after the delete.
+    if future is not None:
+        future.result()
+    get_backend().delete(key)
+
+
+def wait():
+    for future in list(_futures):
+        future.result()
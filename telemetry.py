@@ -0,0 +1,139 @@
+import os
+import hashlib
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+TELEMETRY_DB = os.environ.get('TELEMETRY_DB', 'telemetry.db')
+STORE_PROMPTS = os.environ.get('TELEMETRY_STORE_PROMPTS') == '1'
+
+# USD per million tokens for gemini-2.5-flash; thinking tokens bill as output.
+INPUT_COST_PER_M = 0.30
+OUTPUT_COST_PER_M = 2.50
+
+_lock = threading.Lock()
+_conn = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_call (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    generator TEXT NOT NULL,
+    user_id INTEGER,
+    prompt_hash TEXT NOT NULL,
+    prompt_chars INTEGER NOT NULL,
+    prompt TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    response_tokens INTEGER NOT NULL DEFAULT 0,
+    thoughts_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL NOT NULL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    outcome TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_model_call_user_created ON model_call (user_id, created_at);
+CREATE VIEW IF NOT EXISTS model_call_rollup AS
+SELECT
+    generator,
+    user_id,
+    COUNT(*) AS calls,
+    SUM(outcome != 'ok') AS failures,
+    SUM(retries) AS retries,
+    SUM(prompt_tokens) AS prompt_tokens,
+    SUM(response_tokens + thoughts_tokens) AS output_tokens,
+    ROUND(AVG(latency_ms), 1) AS avg_latency_ms,
+    ROUND(MAX(latency_ms), 1) AS max_latency_ms,
+    ROUND((SUM(prompt_tokens) * {input_cost} + SUM(response_tokens + thoughts_tokens) * {output_cost}) / 1000000.0, 6) AS cost_usd
+FROM model_call
+GROUP BY generator, user_id;
+""".format(input_cost=INPUT_COST_PER_M, output_cost=OUTPUT_COST_PER_M)
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(TELEMETRY_DB, timeout=5, check_same_thread=False)
+        _conn.row_factory = sqlite3.Row
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _usage(response):
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return 0, 0, 0
+    return (
+        usage.prompt_token_count or 0,
+        usage.candidates_token_count or 0,
+        getattr(usage, 'thoughts_token_count', None) or 0
+    )
+
+
+def _has_text(response):
+    # Checked per candidate: response.text only reads the first one and warns when there are several.
+    for candidate in getattr(response, 'candidates', None) or []:
+        if candidate.content and any(part.text for part in candidate.content.parts or []):
+            return True
+    return False
+
+
+def record_call(generator, user_id, prompt, response, latency, retries=0, error=None):
+    prompt_tokens, response_tokens, thoughts_tokens = _usage(response)
+    if error is not None:
+        outcome = 'error'
+    elif response is None or not _has_text(response):
+        outcome = 'empty'
+    else:
+        outcome = 'ok'
+
+    try:
+        with _lock:
+            conn = _get_conn()
+            conn.execute(
+                'INSERT INTO model_call (created_at, generator, user_id, prompt_hash, prompt_chars, prompt, '
+                'prompt_tokens, response_tokens, thoughts_tokens, latency_ms, retries, outcome, error) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    datetime.utcnow().isoformat(),
+                    generator,
+                    user_id,
+                    hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16],
+                    len(prompt),
+                    prompt if STORE_PROMPTS else None,
+                    prompt_tokens,
+                    response_tokens,
+                    thoughts_tokens,
+                    round(latency * 1000, 1),
+                    retries,
+                    outcome,
+                    str(error)[:500] if error is not None else None
+                )
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logging.error(f"Error recording model call telemetry: {e}")
+
+
+def rollup(user_id=None):
+    with _lock:
+        conn = _get_conn()
+        if user_id is None:
+            rows = conn.execute('SELECT * FROM model_call_rollup ORDER BY cost_usd DESC').fetchall()
+        else:
+            rows = conn.execute(
+                'SELECT * FROM model_call_rollup WHERE user_id = ? ORDER BY cost_usd DESC', (user_id,)
+            ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_user_usage(user_id, days=1):
+    since = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    with _lock:
+        row = _get_conn().execute(
+            'SELECT COUNT(*) AS calls, COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens, '
+            'COALESCE(SUM(response_tokens + thoughts_tokens), 0) AS output_tokens '
+            'FROM model_call WHERE user_id = ? AND created_at >= ?',
+            (user_id, since)
+        ).fetchone()
+    return dict(row)
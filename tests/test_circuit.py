@@ -0,0 +1,32 @@
+import pytest
+
+import circuit
+import gemini_helper
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = circuit.CircuitBreaker('test')
+    monkeypatch.setattr(circuit, 'breaker', breaker)
+    return breaker
+
+
+def test_failed_config_during_probe_releases_it(breaker, monkeypatch):
+    def broken_config(template, candidate_count=1):
+        raise ValueError('bad schema')
+
+    monkeypatch.setattr(gemini_helper, '_generation_config', broken_config)
+    breaker._transition(circuit.HALF_OPEN)
+
+    with pytest.raises(ValueError):
+        gemini_helper._generate_content(object(), 'rewrite', 'prompt', user_id=1)
+
+    assert breaker.state == circuit.HALF_OPEN
+    breaker.allow()
+
+
+def test_probe_still_exclusive(breaker):
+    breaker._transition(circuit.HALF_OPEN)
+    breaker.allow()
+    with pytest.raises(circuit.CircuitOpenError):
+        breaker.allow()
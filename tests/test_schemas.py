@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+import schemas
+
+POST = {'hook': 'Hook', 'body': 'Body', 'cta': 'Follow me', 'full_post': 'Hook\n\nBody\n\nFollow me', 'carousel': []}
+
+
+@pytest.mark.parametrize('text', ['[]', '{}', '{', '{"hook": '])
+def test_blank_repairs_are_rejected(text):
+    with pytest.raises(ValueError):
+        schemas.decode_response(schemas.PostResult, text, 'post')
+
+
+@pytest.mark.parametrize('schema', [
+    schemas.RewriteResult, schemas.CarouselResult, schemas.MessageResult,
+    schemas.CalendarPlan, schemas.AnalyticsResult, schemas.ComparisonResult
+])
+def test_missing_primary_content_is_rejected(schema):
+    with pytest.raises(ValueError):
+        schemas.decode_response(schema, '{}')
+
+
+def test_truncated_response_keeps_content():
+    text = json.dumps(POST)
+    assert schemas.decode_response(schemas.PostResult, text[:-1])['full_post'] == POST['full_post']
+
+
+def test_truncated_before_primary_content_is_rejected():
+    text = json.dumps(POST)
+    with pytest.raises(ValueError):
+        schemas.decode_response(schemas.PostResult, text[:text.index('"full_post"')])
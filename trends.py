@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+# Trend, distribution, outlier and cadence features for an analytics upload.
+# Every feature is a single window/rank/diff pass over the posts, and the
+# result is a fixed set of numbers so the recommendation prompt stays the same
+# size whether the export has 20 posts or 20,000.
+
+ROLLING_POSTS = 7
+VIRAL_Z = 2.0
+FLOP_Z = -1.5
+MAX_EXAMPLES = 3
+LONG_GAP_FACTOR = 2
+
+# (name, description) in prompt order.
+FEATURES = [
+    ('impressions_change_pct', f'avg impressions of the last {ROLLING_POSTS} posts vs the first {ROLLING_POSTS}, %'),
+    ('engagement_rate_change_pts', f'engagement rate of the last {ROLLING_POSTS} posts vs the first {ROLLING_POSTS}, pts'),
+    ('impressions_trend_pct_per_10_posts', 'fitted impressions growth per 10 posts, %'),
+    ('best_window_vs_mean', f'best {ROLLING_POSTS}-post stretch vs overall average impressions, x'),
+    ('recent_percentile', f'average percentile rank of the last {ROLLING_POSTS} posts'),
+    ('p90_to_median', '90th percentile impressions / median'),
+    ('top_decile_impressions_share_pct', 'share of all impressions from the top 10% of posts, %'),
+    ('viral_posts', f'posts with z >= {VIRAL_Z} on log impressions'),
+    ('flop_posts', f'posts with z <= {FLOP_Z} on log impressions'),
+    ('viral_impressions_share_pct', 'share of all impressions from viral posts, %'),
+    ('posts_per_week', 'posts per week over the whole range'),
+    ('median_gap_days', 'median days between posts'),
+    ('max_gap_days', 'longest break between posts, days'),
+    ('gap_cv', 'variation of the gaps between posts (std / mean)'),
+    ('active_week_share_pct', 'weeks with at least one post, %'),
+    ('after_break_impressions_change_pct', f'impressions of posts after a break over {LONG_GAP_FACTOR}x the median gap vs the rest, %'),
+]
+
+
+def _round(value, digits=2):
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def _ordered(frame):
+    if frame['date'].notna().any():
+        frame = frame[frame['date'].notna()].sort_values('date', kind='stable')
+    return frame.reset_index(drop=True)
+
+
+def zscores(impressions):
+    # Impressions are heavy-tailed, so scores are taken on the log scale.
+    values = np.log1p(impressions.clip(lower=0))
+    std = values.std(ddof=0)
+    if not std:
+        return pd.Series(0.0, index=impressions.index)
+    return (values - values.mean()) / std
+
+
+def feature_vector(frame):
+    frame = _ordered(frame)
+    features = dict.fromkeys(name for name, _ in FEATURES)
+    impressions = frame['impressions']
+    n = len(frame)
+    if n < 2 or impressions.sum() <= 0:
+        return features
+
+    engagement = frame[['reactions', 'comments', 'shares']].sum(axis=1)
+    mean = impressions.mean()
+
+    if n >= 2 * ROLLING_POSTS:
+        rolling_impressions = impressions.rolling(ROLLING_POSTS).mean()
+        rolling_rate = engagement.rolling(ROLLING_POSTS).sum() / impressions.rolling(ROLLING_POSTS).sum().replace(0, np.nan)
+        first, last = ROLLING_POSTS - 1, n - 1
+        features['impressions_change_pct'] = _round((rolling_impressions[last] / rolling_impressions[first] - 1) * 100, 1) if rolling_impressions[first] else None
+        features['engagement_rate_change_pts'] = _round((rolling_rate[last] - rolling_rate[first]) * 100)
+        features['best_window_vs_mean'] = _round(rolling_impressions.max() / mean)
+
+    # Least-squares slope of log impressions against post order.
+    x = np.arange(n) - (n - 1) / 2
+    y = np.log1p(impressions.to_numpy(dtype=float))
+    slope = (x * (y - y.mean())).sum() / (x * x).sum()
+    features['impressions_trend_pct_per_10_posts'] = _round((np.exp(slope * 10) - 1) * 100, 1)
+
+    ranks = impressions.rank(pct=True)
+    features['recent_percentile'] = _round(ranks.iloc[-ROLLING_POSTS:].mean() * 100, 1)
+    median = impressions.median()
+    features['p90_to_median'] = _round(impressions.quantile(0.9) / median) if median else None
+    features['top_decile_impressions_share_pct'] = _round(impressions[ranks > 0.9].sum() / impressions.sum() * 100, 1)
+
+    z = zscores(impressions)
+    viral = z >= VIRAL_Z
+    features['viral_posts'] = int(viral.sum())
+    features['flop_posts'] = int((z <= FLOP_Z).sum())
+    features['viral_impressions_share_pct'] = _round(impressions[viral].sum() / impressions.sum() * 100, 1)
+
+    dates = frame['date']
+    if dates.notna().sum() >= 2:
+        gaps = dates.diff().dt.total_seconds() / 86400
+        span_days = (dates.iloc[-1] - dates.iloc[0]).total_seconds() / 86400
+        median_gap = gaps.median()
+        features['posts_per_week'] = _round(n / max(span_days / 7, 1), 1)
+        features['median_gap_days'] = _round(median_gap, 1)
+        features['max_gap_days'] = _round(gaps.max(), 1)
+        features['gap_cv'] = _round(gaps.std(ddof=0) / gaps.mean()) if gaps.mean() else None
+        weeks = dates.dt.to_period('W')
+        total_weeks = (weeks.iloc[-1] - weeks.iloc[0]).n + 1
+        features['active_week_share_pct'] = _round(weeks.nunique() / total_weeks * 100, 1)
+        if median_gap:
+            after_break = gaps > LONG_GAP_FACTOR * median_gap
+            rest_mean = impressions[~after_break].mean()
+            if after_break.any() and rest_mean:
+                features['after_break_impressions_change_pct'] = _round((impressions[after_break].mean() / rest_mean - 1) * 100, 1)
+
+    return features
+
+
+def outliers(frame):
+    frame = _ordered(frame)
+    if len(frame) < 2:
+        return []
+    scored = frame.assign(z=zscores(frame['impressions']))
+    examples = []
+    for kind, rows in (
+        ('viral', scored[scored['z'] >= VIRAL_Z].nlargest(MAX_EXAMPLES, 'z')),
+        ('flop', scored[scored['z'] <= FLOP_Z].nsmallest(MAX_EXAMPLES, 'z'))
+    ):
+        for row in rows.itertuples():
+            examples.append({
+                'kind': kind,
+                'title': (row.title or 'Untitled')[:80],
+                'impressions': int(row.impressions),
+                'z': round(float(row.z), 1),
+                'day': row.date.day_name() if pd.notna(row.date) else None,
+                'type': row.type
+            })
+    return examples
+
+
+def describe(features):
+    return '\n'.join(
+        f"- {description}: {'n/a' if features.get(name) is None else features[name]}"
+        for name, description in FEATURES
+    )
+
+
+def describe_outliers(examples):
+    if not examples:
+        return 'None'
+    lines = []
+    for example in examples:
+        details = ', '.join(str(value) for value in (example['day'], example['type']) if value)
+        lines.append(
+            f"- {example['kind']} (z {example['z']:+}, {example['impressions']} impressions"
+            f"{', ' + details if details else ''}): {example['title']}"
+        )
+    return '\n'.join(lines)